@@ -11,6 +11,10 @@ import ContentDisplay from '../components/ContentDisplay';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000';
 
+// The API returns generated images as paths under /blobs/ on the API host
+const toImageUrls = (images?: string[] | null): string[] | null =>
+  images ? images.map(src => (src.startsWith('/') ? `${API_BASE_URL}${src}` : src)) : null;
+
 type Stage = 'form' | 'outlines' | 'draft';
 
 interface OutlineSection {
@@ -226,7 +230,7 @@ export default function BlogGenerationPage() {
       console.log('Image Regenerate API Response:', data);
 
       if (data.generated_images) {
-        setGeneratedImages(data.generated_images);
+        setGeneratedImages(toImageUrls(data.generated_images));
         setImagePrompt(data.image_prompt || null);
         setStatusMessage('Image regenerated successfully');
 
@@ -288,7 +292,7 @@ export default function BlogGenerationPage() {
         setStage('draft');
         setCurrentStep(3);
         setDraftArticle(data.draft_article);
-        setGeneratedImages(data.generated_images || null);
+        setGeneratedImages(toImageUrls(data.generated_images));
         setImagePrompt(data.image_prompt || null);
         setFollowUpQuestion(data.follow_up_question || '');
         setStatusMessage('Step 3: Draft Generated');
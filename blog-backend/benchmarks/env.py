@@ -0,0 +1,23 @@
+import os
+
+# Application log level while benchmarking; INFO measures production-like logging overhead.
+BENCH_LOG_LEVEL = os.getenv("BENCH_LOG_LEVEL", "WARNING").upper()
+
+
+def isolate(scratch_dir: str) -> None:
+    """
+    Environment defaults for benchmark processes, applied before any app module
+    is imported: no real caches or earlier results are reused (every LLM call
+    pays the stub latency), blobs go to scratch_dir and tracing is off.
+    Settings already present in the environment win.
+    """
+    for key, value in {
+        "LLM_CACHE_MODE": "off",
+        "SEARCH_CACHE_PATH": "",
+        "PAGE_CACHE_PATH": "",
+        "WRITING_STYLE_CACHE_PATH": "",
+        "CHECKPOINTER": "memory",
+        "BLOB_STORE_PATH": os.path.join(scratch_dir, "blobs"),
+        "TRACE_SAMPLE_RATE": "0",
+    }.items():
+        os.environ.setdefault(key, value)
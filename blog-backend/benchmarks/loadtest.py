@@ -0,0 +1,382 @@
+"""
+Concurrent HTTP load test of one src.main:app worker.
+
+Sessions arrive as a Poisson process, one stage per arrival rate, and each
+runs a realistic conversation with think times between requests:
+/generate, --edits outline edits via /user_input, approval (which writes the
+draft and images), then /regenerate_image. By default a uvicorn worker
+serving benchmarks.stub_server (providers stubbed with configurable latency)
+is started on a free port and its RSS is sampled throughout.
+
+Run from blog-backend/:
+
+    python -m benchmarks.loadtest                                   # default stages
+    python -m benchmarks.loadtest --rates 1,2,4,8 --stage-seconds 60 --think-time 2
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --pid 12345   # an already running server
+
+A stage meets the SLO when every endpoint's p99 is within --slo-p99-ms, its
+error rate is at most --max-error-rate and all of its sessions finished; the
+first stage that misses it is reported as the saturation point.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EDIT_FEEDBACK = (
+    "add a section on pricing",
+    "make the outline shorter",
+    "rewrite the introduction for beginners",
+    "add a section with real-world examples",
+)
+ENDPOINTS = ("/generate", "/user_input (edit)", "/user_input (approve)", "/regenerate_image")
+
+
+# ---------------------------------------------------------------- server
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(scratch_dir: str) -> Tuple[subprocess.Popen, str]:
+    """One uvicorn worker serving benchmarks.stub_server; output goes to scratch_dir/server.log."""
+    port = _free_port()
+    env = {**os.environ, "BENCH_SCRATCH_DIR": scratch_dir}
+    log = open(os.path.join(scratch_dir, "server.log"), "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.stub_server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(url: str, process: Optional[subprocess.Popen], timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{url}/stats/clients")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"server at {url} not ready after {timeout:.0f}s")
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process (Linux /proc); None when unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# ---------------------------------------------------------------- load
+
+class Stage:
+    """Offered load of one arrival rate; its sessions finish before the next stage starts."""
+
+    def __init__(self, index: int, rate: float):
+        self.index = index
+        self.rate = rate
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.active = 0
+        self.peak_active = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.rss_end_mb: Optional[float] = None
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.run_id = f"{int(time.time()):x}"
+        self.sessions: List[asyncio.Task] = []
+
+    async def _think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+    async def _request(self, stage: Stage, endpoint: str, path: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        start = perf_counter()
+        try:
+            response = await self.client.post(path, json=body)
+        except httpx.HTTPError as e:
+            stage.errors[endpoint][type(e).__name__] += 1
+            return None
+        elapsed = perf_counter() - start
+        if response.status_code != 200:
+            stage.errors[endpoint][str(response.status_code)] += 1
+            return None
+        stage.latencies[endpoint].append(elapsed)
+        return response.json()
+
+    async def session(self, stage: Stage, number: int) -> None:
+        session_id = f"load-{self.run_id}-{stage.index}-{number}"
+        stage.started += 1
+        stage.active += 1
+        stage.peak_active = max(stage.peak_active, stage.active)
+        ok = cancelled = False
+        try:
+            state = await self._request(stage, "/generate", "/generate", {
+                "session_id": session_id,
+                "topic": "Scaling LLM applications",
+                "keywords": "latency, throughput, caching",
+                "tone": "Professional",
+                "num_outlines": 5,
+                "target_audience": "Engineering leads",
+                "reference_urls": [f"https://ref.example.com/{session_id}"],
+            })
+            for i in range(self.args.edits):
+                if state is None:
+                    return
+                await self._think()
+                state = await self._request(stage, "/user_input (edit)", "/user_input", {
+                    "session_id": session_id, "user_feedback": EDIT_FEEDBACK[i % len(EDIT_FEEDBACK)]})
+            if state is None:
+                return
+            await self._think()
+            state = await self._request(stage, "/user_input (approve)", "/user_input",
+                                        {"session_id": session_id, "user_feedback": "looks good"})
+            if state is None:
+                return
+            if not state.get("draft_article"):
+                stage.errors["/user_input (approve)"]["no draft"] += 1
+                return
+            await self._think()
+            state = await self._request(stage, "/regenerate_image", "/regenerate_image",
+                                        {"session_id": session_id, "image_feedback": "brighter colours"})
+            ok = state is not None
+        except asyncio.CancelledError:
+            # still running at the drain timeout: reported as unfinished
+            cancelled = True
+            raise
+        finally:
+            stage.active -= 1
+            if ok:
+                stage.completed += 1
+            elif not cancelled:
+                stage.failed += 1
+
+    async def run_stage(self, stage: Stage) -> None:
+        """Open-loop Poisson arrivals for --stage-seconds; sessions are not waited for."""
+        deadline = perf_counter() + self.args.stage_seconds
+        number = 0
+        while True:
+            await asyncio.sleep(self.rng.expovariate(stage.rate))
+            if perf_counter() >= deadline:
+                return
+            self.sessions.append(asyncio.create_task(self.session(stage, number)))
+            number += 1
+
+
+async def sample_rss(pid: int, samples: List[Tuple[float, float]], interval: float = 0.5) -> None:
+    start = perf_counter()
+    while True:
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append((round(perf_counter() - start, 2), round(value, 1)))
+        await asyncio.sleep(interval)
+
+
+# ---------------------------------------------------------------- report
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def stage_report(stage: Stage, args: argparse.Namespace) -> Dict[str, Any]:
+    endpoints = {}
+    worst_p99 = 0.0
+    requests = errors = 0
+    for endpoint in ENDPOINTS:
+        ordered = sorted(stage.latencies.get(endpoint, []))
+        failed = sum(stage.errors.get(endpoint, {}).values())
+        if not ordered and not failed:
+            continue
+        total = len(ordered) + failed
+        requests += total
+        errors += failed
+        entry: Dict[str, Any] = {"requests": total, "error_rate": round(failed / total, 4),
+                                 "errors": dict(stage.errors.get(endpoint, {}))}
+        if ordered:
+            entry.update({f"p{p}_ms": round(_percentile(ordered, p) * 1000, 1) for p in (50, 90, 99)})
+            entry["max_ms"] = round(ordered[-1] * 1000, 1)
+            worst_p99 = max(worst_p99, entry["p99_ms"])
+        endpoints[endpoint] = entry
+    error_rate = errors / requests if requests else 0.0
+    unfinished = stage.started - stage.completed - stage.failed
+    meets_slo = (stage.started > 0 and worst_p99 <= args.slo_p99_ms
+                 and error_rate <= args.max_error_rate and unfinished == 0)
+    return {
+        "rate_per_s": stage.rate,
+        "sessions": {"started": stage.started, "completed": stage.completed, "failed": stage.failed,
+                     "unfinished": unfinished, "peak_active": stage.peak_active},
+        "requests": requests,
+        "error_rate": round(error_rate, 4),
+        "worst_p99_ms": worst_p99,
+        "meets_slo": meets_slo,
+        "rss_end_mb": stage.rss_end_mb,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for stage in report["stages"]:
+        s = stage["sessions"]
+        print(f"\nstage {stage['rate_per_s']}/s | sessions {s['started']} started, {s['completed']} completed, "
+              f"{s['failed']} failed, {s['unfinished']} unfinished, peak {s['peak_active']} active | "
+              f"errors {stage['error_rate']:.2%} | rss {stage['rss_end_mb']} MB | "
+              f"{'meets SLO' if stage['meets_slo'] else 'MISSES SLO'}")
+        print(f"  {'endpoint':24} {'requests':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+        for endpoint, e in stage["endpoints"].items():
+            print(f"  {endpoint:24} {e['requests']:>8} {e.get('p50_ms', '-'):>9} {e.get('p90_ms', '-'):>9} "
+                  f"{e.get('p99_ms', '-'):>9} {e.get('max_ms', '-'):>9} {e['error_rate']:>7.2%}")
+    memory = report["memory"]
+    if memory:
+        print(f"\nserver rss: start {memory['start_mb']} MB, peak {memory['peak_mb']} MB, "
+              f"end {memory['end_mb']} MB, growth {memory['growth_mb']:+} MB")
+    saturation = report["saturation"]
+    sustained, saturated = saturation["max_sustained_rate_per_s"], saturation["saturated_at_rate_per_s"]
+    print(f"max sustained rate: {f'{sustained}/s' if sustained is not None else 'none'} | "
+          f"saturation at: {f'{saturated}/s' if saturated is not None else 'not reached'} "
+          f"(SLO: p99 <= {report['settings']['slo_p99_ms']:.0f} ms, errors <= {report['settings']['max_error_rate']:.1%})")
+
+
+# ---------------------------------------------------------------- main
+
+async def run(args: argparse.Namespace, url: str, pid: Optional[int], process: Optional[subprocess.Popen]) -> Dict[str, Any]:
+    await wait_ready(url, process)
+    samples: List[Tuple[float, float]] = []
+    sampler = asyncio.create_task(sample_rss(pid, samples)) if pid else None
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.max_keepalive)
+    stages = [Stage(i, rate) for i, rate in enumerate(args.rates)]
+
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        test = LoadTest(client, args)
+        start_rss = rss_mb(pid) if pid else None
+        for stage in stages:
+            print(f"[LOAD] stage {stage.index + 1}/{len(stages)}: {stage.rate} sessions/s for {args.stage_seconds:.0f}s",
+                  file=sys.stderr, flush=True)
+            await test.run_stage(stage)
+            # let this stage's sessions finish so the next rate is measured on its own
+            pending = [t for t in test.sessions if not t.done()]
+            if pending:
+                _, still_running = await asyncio.wait(pending, timeout=args.drain_timeout)
+                for task in still_running:
+                    task.cancel()
+                await asyncio.gather(*still_running, return_exceptions=True)
+            test.sessions.clear()
+            stage_rss = rss_mb(pid) if pid else None
+            stage.rss_end_mb = round(stage_rss, 1) if stage_rss is not None else None
+        end_rss = rss_mb(pid) if pid else None
+        try:
+            checkpointer = (await client.get("/stats/checkpointer")).json()
+        except (httpx.HTTPError, ValueError):
+            checkpointer = None
+
+    if sampler is not None:
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+
+    reports = [stage_report(stage, args) for stage in stages]
+    sustained = [r["rate_per_s"] for r in reports if r["meets_slo"]]
+    first_miss = next((r["rate_per_s"] for r in reports if not r["meets_slo"]), None)
+    memory = None
+    if samples and start_rss is not None and end_rss is not None:
+        memory = {"start_mb": round(start_rss, 1), "peak_mb": max(v for _, v in samples),
+                  "end_mb": round(end_rss, 1), "growth_mb": round(end_rss - start_rss, 1), "samples": samples}
+    return {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output",)},
+        "stages": reports,
+        "saturation": {
+            # highest rate before the first stage that missed the SLO
+            "max_sustained_rate_per_s": max((r for r in sustained if first_miss is None or r < first_miss), default=None),
+            "saturated_at_rate_per_s": first_miss,
+        },
+        "memory": memory,
+        "checkpointer": checkpointer,
+    }
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent multi-turn session load test.")
+    parser.add_argument("--rates", default="1,2,4,8,16,32", help="comma-separated session arrival rates per second, one stage each")
+    parser.add_argument("--stage-seconds", type=float, default=30, help="duration of each stage")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean think time between requests (s); 0 disables")
+    parser.add_argument("--edits", type=int, default=2, help="outline edits per session before approval")
+    parser.add_argument("--slo-p99-ms", type=float, default=5000, help="p99 latency objective for every endpoint")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="error rate objective per stage")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout (s)")
+    parser.add_argument("--drain-timeout", type=float, default=120, help="wait for a stage's sessions to finish after its arrivals stop (s)")
+    parser.add_argument("--max-keepalive", type=int, default=100, help="client keep-alive connections")
+    parser.add_argument("--seed", type=int, default=7, help="seed for arrivals and think times")
+    parser.add_argument("--url", help="load an already running server instead of starting a stub server")
+    parser.add_argument("--pid", type=int, help="with --url: server process to sample RSS from")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    args = parser.parse_args(argv)
+    args.rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    if not args.rates or min(args.rates) <= 0:
+        parser.error("--rates needs positive arrival rates")
+
+    scratch_dir = tempfile.mkdtemp(prefix="blog-load-")
+    process = None
+    try:
+        if args.url:
+            url, pid = args.url.rstrip("/"), args.pid
+        else:
+            process, url = start_server(scratch_dir)
+            pid = process.pid
+        report = asyncio.run(run(args, url, pid, process))
+    except RuntimeError as e:
+        print(f"[LOAD] {e}; server output is in {scratch_dir}/server.log", file=sys.stderr)
+        if process is not None:
+            process.terminate()
+        return 2
+    finally:
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,396 @@
+"""
+Offline benchmarks: DeepSeek, Perplexity, the URL loader and Gemini are
+replaced by the stubs in benchmarks/stubs.py, so only this service's own
+work plus the configured stub latency is measured.
+
+Run from blog-backend/:
+
+    python -m benchmarks.run                      # all suites, compared with benchmarks/baseline.json
+    python -m benchmarks.run --only flow,nodes    # selected suites
+    python -m benchmarks.run --check              # exit 1 on a regression beyond BENCH_REGRESSION_PCT
+    python -m benchmarks.run --update-baseline    # record the results as the new baseline
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import shutil
+import asyncio
+import inspect
+import argparse
+import logging
+import platform
+import resource
+import tempfile
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.env import BENCH_LOG_LEVEL, isolate
+
+_SCRATCH = tempfile.mkdtemp(prefix="blog-bench-")
+isolate(_SCRATCH)
+
+from benchmarks import stubs  # noqa: E402
+
+main = stubs.install()
+
+import httpx  # noqa: E402
+from src import nodes  # noqa: E402
+from src.graph import State, workflow  # noqa: E402
+from utils.blobs import stash_articles  # noqa: E402
+from utils.checkpoint import CHECKPOINT_HISTORY, CHECKPOINT_SESSION_TTL, get_checkpointer  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+# A p50 this much slower (or throughput this much lower) than the baseline is a regression;
+# p99 is reported but too noisy at these sample sizes to gate on.
+BENCH_REGRESSION_PCT = float(os.getenv("BENCH_REGRESSION_PCT", "20"))
+BENCH_ARTICLES = int(os.getenv("BENCH_ARTICLES", "10"))
+BENCH_ARTICLE_KB = int(os.getenv("BENCH_ARTICLE_KB", "40"))
+
+
+# ---------------------------------------------------------------- measurement
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter (Linux); False when unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def measure(fn: Callable[[int], Any], iterations: int, concurrency: int = 1, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Call fn(i) `iterations` times, at most `concurrency` at once, after `warmup`
+    untimed calls. fn may be sync or async; an exception counts as an error.
+    """
+    async def call(i: int) -> None:
+        result = fn(i)
+        if inspect.isawaitable(result):
+            await result
+
+    for i in range(warmup):
+        await call(-1 - i)
+
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                errors += 1
+                logger.warning("[BENCH] iteration %d failed: %r", i, e)
+                return
+            latencies.append(perf_counter() - start)
+
+    exact_peak = _reset_peak_rss()
+    start = perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(iterations)))
+    wall = perf_counter() - start
+
+    ordered = sorted(latencies) or [float("nan")]
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_scope": "benchmark" if exact_peak else "process",
+    }
+
+
+# ---------------------------------------------------------------- fixtures
+
+def _articles(tag: str) -> List[Dict[str, Any]]:
+    words = BENCH_ARTICLE_KB * 1024 // 8
+    return [{"title": f"Article {i}", "url": f"https://example.com/{tag}/{i}",
+             "content": stubs.filler(words, f"{tag}{i}"), "score": None, "published_date": ""}
+            for i in range(BENCH_ARTICLES)]
+
+
+def _outlines() -> Dict[str, Any]:
+    return json.loads(stubs.chat_model()._respond("article outline"))
+
+
+def _draft() -> Dict[str, Any]:
+    return json.loads(stubs.chat_model()._respond(""))
+
+
+def _config(session_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": session_id}}
+
+
+def _run_id() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+# ---------------------------------------------------------------- suites
+
+async def _flow_session(client: httpx.AsyncClient, session_id: str) -> Tuple[float, float]:
+    """One session: /generate, then approve. Returns the seconds spent in each step."""
+    start = perf_counter()
+    r = await client.post("/generate", json={
+        "session_id": session_id,
+        "topic": "Benchmarking LLM applications",
+        "keywords": "latency, throughput, caching",
+        "num_outlines": stubs.BENCH_SECTIONS,
+        "reference_urls": [f"https://ref.example.com/{session_id}"],
+    })
+    r.raise_for_status()
+    generated = perf_counter()
+    r = await client.post("/user_input", json={"session_id": session_id, "user_feedback": "looks good"})
+    r.raise_for_status()
+    if not r.json().get("draft_article"):
+        raise RuntimeError(f"no draft after approval: stage={r.json().get('current_stage')}")
+    return generated - start, perf_counter() - generated
+
+
+async def bench_flow(iterations: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """
+    /generate -> approve -> draft over HTTP (in process), plus each step on its
+    own, then one more session after the app is shut down and started again:
+    shutdown closes the provider pools, and the next start must not reuse them.
+    """
+    run = _run_id()
+    steps: Dict[str, List[float]] = {"generate": [], "approve": []}
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        async def flow(i: int) -> None:
+            generate, approve = await _flow_session(client, f"bench-flow-{run}-{i}")
+            if i >= 0:
+                steps["generate"].append(generate)
+                steps["approve"].append(approve)
+
+        results = {"flow.generate_approve_draft": await measure(flow, iterations, concurrency)}
+
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        restart = await measure(lambda i: _flow_session(client, f"bench-flow-{run}-restart-{i}"), 1, 1, warmup=0)
+    # A single session: only its errors are compared, its latency is not a benchmark.
+    results["flow.after_lifespan_restart"] = {k: restart[k] for k in ("iterations", "concurrency", "errors")}
+
+    for step, latencies in steps.items():
+        ordered = sorted(latencies) or [float("nan")]
+        results[f"flow.{step}"] = {
+            "iterations": len(latencies),
+            "concurrency": concurrency,
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        }
+    return results
+
+
+async def bench_nodes(iterations: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """Each graph node called directly with a prepared state."""
+    run = _run_id()
+    articles = stash_articles(_articles(run))
+    outlines = _outlines()
+    draft = _draft()
+
+    def session(i: int) -> Dict[str, Any]:
+        return _config(f"bench-node-{run}-{i}")
+
+    cases: Dict[str, Callable[[int], Awaitable[Any]]] = {
+        "search_articles_citations": lambda i: nodes.search_articles_citations_node(
+            State(topic="Benchmarks", keywords="latency, throughput, caching",
+                  custom_urls=[f"https://custom.example.com/{run}/{i}"]), session(i)),
+        "extract_writing_style": lambda i: nodes.extract_writing_style_node(
+            State(reference_urls=[f"https://ref.example.com/{run}/{i}"]), session(i)),
+        "generate_outlines": lambda i: nodes.generate_outlines_node(
+            State(topic="Benchmarks", keywords="latency, throughput, caching", num_outlines=stubs.BENCH_SECTIONS,
+                  articles=articles), session(i)),
+        "outline_router_llm": lambda i: nodes.outline_router_node(
+            State(outlines_json=outlines, user_feedback="could the third section go deeper?")),
+        "write_sections": lambda i: nodes.write_sections_node(
+            State(topic="Benchmarks", keywords="latency, throughput, caching", outlines_json=outlines,
+                  articles=articles), session(i)),
+        "generate_images": lambda i: nodes.generate_images_node(
+            State(topic="Benchmarks", draft_article=draft)),
+    }
+    return {f"node.{name}": await measure(fn, iterations, concurrency) for name, fn in cases.items()}
+
+
+async def bench_coerce_json(iterations: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """_coerce_json on large LLM outputs: plain JSON, fenced JSON and unparseable text."""
+    results = {}
+    for size_kb in (100, 1024):
+        body = stubs.filler(size_kb * 1024 // 8, "coerce")
+        plain = json.dumps({"title": "T", "content": body, "citations": [], "follow_up_question": "?"})
+        for variant, text in (("plain", plain), ("fenced", f"```json\n{plain}\n```"), ("invalid", plain[:-1])):
+            results[f"coerce_json.{variant}_{size_kb}kb"] = await measure(
+                lambda i, text=text: nodes._coerce_json(text), iterations, 1, warmup=5)
+    return results
+
+
+async def bench_checkpoint(iterations: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """aupdate_state + aget_state round trips of a late-stage session (stashed articles, big draft, images)."""
+    run = _run_id()
+    articles = stash_articles(_articles(run))
+    draft = _draft()
+    images = await stubs.agenerate_images("Benchmark", "", "", number_of_images=2)
+    results = {}
+    for backend in ("memory", "sqlite"):
+        if backend == "sqlite":
+            from utils.checkpoint_sqlite import SharedSqliteSaver
+            saver = SharedSqliteSaver(os.path.join(_SCRATCH, f"checkpoints-{run}.sqlite"),
+                                      ttl=CHECKPOINT_SESSION_TTL or None, max_checkpoints=CHECKPOINT_HISTORY or None)
+        else:
+            saver = get_checkpointer()
+        graph = workflow.compile(checkpointer=saver)
+
+        async def round_trip(i: int) -> None:
+            # a handful of long-lived sessions, each updated many times
+            config = _config(f"bench-ckpt-{run}-{backend}-{i % max(concurrency, 1)}")
+            await graph.aupdate_state(config, {
+                "topic": "Benchmarks", "articles": articles, "outlines_json": _outlines(),
+                "draft_article": {**draft, "content": f"{draft['content']}\n\nRevision {i}"},
+                "image_hashes": images[0], "image_count": len(images[0]), "current_stage": "draft",
+            }, as_node="generate_images")
+            snapshot = await graph.aget_state(config)
+            if not snapshot.values.get("draft_article"):
+                raise RuntimeError("checkpoint lost the draft")
+
+        results[f"checkpoint.{backend}"] = await measure(round_trip, iterations, concurrency)
+    return results
+
+
+SUITES = {
+    # name: (function, default iterations, default concurrency)
+    "flow": (bench_flow, 12, 4),
+    "nodes": (bench_nodes, 10, 1),
+    "coerce_json": (bench_coerce_json, 200, 1),
+    "checkpoint": (bench_checkpoint, 300, 4),
+}
+
+
+# ---------------------------------------------------------------- reporting
+
+def _change(current: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    if current is None or not baseline or math.isnan(current) or math.isnan(baseline):
+        return None
+    return (current - baseline) / baseline * 100
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Print a results table against the baseline; return the benchmarks that regressed."""
+    regressions = []
+    print(f"{'benchmark':44} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>9} {'rss MB':>8} {'errors':>6}  vs baseline")
+    for name, r in results.items():
+        base = baseline.get(name, {})
+        deltas = {
+            "p50": _change(r.get("p50_ms"), base.get("p50_ms")),
+            "p99": _change(r.get("p99_ms"), base.get("p99_ms")),
+            "ops/s": _change(r.get("throughput_per_s"), base.get("throughput_per_s")),
+        }
+        notes = ", ".join(f"{k} {v:+.0f}%" for k, v in deltas.items() if v is not None) or "new"
+        regressed = ((deltas["p50"] or 0) > BENCH_REGRESSION_PCT or (deltas["ops/s"] or 0) < -BENCH_REGRESSION_PCT
+                     or r.get("errors", 0) > base.get("errors", 0))
+        if regressed:
+            regressions.append(name)
+            notes += "  REGRESSION"
+        print(f"{name:44} {r.get('p50_ms', ''):>10} {r.get('p99_ms', ''):>10} {r.get('throughput_per_s', ''):>9} "
+              f"{r.get('peak_rss_mb', ''):>8} {r.get('errors', ''):>6}  {notes}")
+    return regressions
+
+
+def _settings() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "stub_latency_ms": {"llm": stubs.BENCH_LLM_LATENCY_MS, "search": stubs.BENCH_SEARCH_LATENCY_MS,
+                            "fetch": stubs.BENCH_FETCH_LATENCY_MS, "image": stubs.BENCH_IMAGE_LATENCY_MS},
+        "sizes": {"sections": stubs.BENCH_SECTIONS, "section_words": stubs.BENCH_SECTION_WORDS,
+                  "search_content_kb": stubs.BENCH_SEARCH_CONTENT_KB, "page_kb": stubs.BENCH_PAGE_KB,
+                  "image_kb": stubs.BENCH_IMAGE_KB, "articles": BENCH_ARTICLES, "article_kb": BENCH_ARTICLE_KB},
+        "log_level": BENCH_LOG_LEVEL,
+    }
+
+
+async def run(suites: List[str], iterations: Optional[int], concurrency: Optional[int]) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in suites:
+        fn, default_iterations, default_concurrency = SUITES[name]
+        print(f"[BENCH] {name} ...", file=sys.stderr, flush=True)
+        results.update(await fn(iterations or default_iterations, concurrency or default_concurrency))
+    return results
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks with stubbed providers.")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--iterations", type=int, help="override each suite's iteration count")
+    parser.add_argument("--concurrency", type=int, help="override each suite's concurrency")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a benchmark regressed")
+    args = parser.parse_args(argv)
+
+    suites = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    logging.getLogger().setLevel(BENCH_LOG_LEVEL)
+    try:
+        results = asyncio.run(run(suites, args.iterations, args.concurrency))
+    finally:
+        shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+    report = {"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "settings": _settings(), "results": results}
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"[BENCH] Baseline written to {args.baseline}", file=sys.stderr)
+    if regressions:
+        print(f"[BENCH] {len(regressions)} regression(s) beyond {BENCH_REGRESSION_PCT:.0f}%: {', '.join(regressions)}",
+              file=sys.stderr)
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,19 @@
+"""
+src.main:app with every provider call answered by benchmarks.stubs, for load tests:
+
+    python -m uvicorn benchmarks.stub_server:app --port 8100
+
+Stub latencies and payload sizes come from the BENCH_* settings in benchmarks/stubs.py.
+"""
+import os
+import logging
+import tempfile
+
+from benchmarks.env import BENCH_LOG_LEVEL, isolate
+
+isolate(os.getenv("BENCH_SCRATCH_DIR") or tempfile.mkdtemp(prefix="blog-load-"))
+
+from benchmarks import stubs  # noqa: E402
+
+app = stubs.install().app
+logging.getLogger().setLevel(BENCH_LOG_LEVEL)
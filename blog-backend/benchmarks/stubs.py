@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from utils.metrics import LLMCallMetrics, track_call
+
+logger = logging.getLogger(__name__)
+
+# Simulated upstream latencies (milliseconds).
+BENCH_LLM_LATENCY_MS = float(os.getenv("BENCH_LLM_LATENCY_MS", "50"))
+BENCH_SEARCH_LATENCY_MS = float(os.getenv("BENCH_SEARCH_LATENCY_MS", "30"))
+BENCH_FETCH_LATENCY_MS = float(os.getenv("BENCH_FETCH_LATENCY_MS", "30"))
+BENCH_IMAGE_LATENCY_MS = float(os.getenv("BENCH_IMAGE_LATENCY_MS", "100"))
+# Simulated payload sizes.
+BENCH_SECTIONS = int(os.getenv("BENCH_SECTIONS", "6"))
+BENCH_SECTION_WORDS = int(os.getenv("BENCH_SECTION_WORDS", "400"))
+BENCH_SEARCH_CONTENT_KB = int(os.getenv("BENCH_SEARCH_CONTENT_KB", "8"))
+BENCH_PAGE_KB = int(os.getenv("BENCH_PAGE_KB", "20"))
+BENCH_IMAGE_KB = int(os.getenv("BENCH_IMAGE_KB", "512"))
+
+_WORDS = ("latency throughput cache model search article section reader market growth data "
+          "pipeline adoption strategy quality evidence analysis platform workflow benchmark").split()
+
+
+def filler(n_words: int, seed: str = "") -> str:
+    """Deterministic prose-like text of n_words words."""
+    offset = int(hashlib.sha256(seed.encode()).hexdigest()[:8], 16) if seed else 0
+    return " ".join(_WORDS[(offset + i * 7 + i // len(_WORDS)) % len(_WORDS)] for i in range(n_words))
+
+
+def _between(text: str, start: str, end: str) -> str:
+    return text.split(start, 1)[1].split(end, 1)[0] if start in text else ""
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model answering each prompt of src.nodes with a well-formed response
+    of configurable size after BENCH_LLM_LATENCY_MS, recognised by the prompt's
+    opening line. Streams in small chunks so the SSE endpoints have tokens to relay.
+    Like ChatDeepSeek it holds the registry's pools and fails once they are closed.
+    """
+
+    latency: float = BENCH_LLM_LATENCY_MS / 1000
+    http_client: Any = None
+    http_async_client: Any = None
+
+    def _check_pool(self, client: Any) -> None:
+        if client is not None and client.is_closed:
+            raise RuntimeError("Cannot send a request, as the client has been closed.")
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench-stub"
+
+    def _respond(self, text: str) -> str:
+        if "Routing Agent" in text:
+            user_input = _between(text, "<user_input>", "</user_input>").strip().lower()
+            approve = any(w in user_input for w in ("looks good", "approve", "go ahead", "perfect"))
+            return json.dumps({"action": "APPROVE" if approve else "EDIT", "feedback": "" if approve else user_input})
+        if "Analyze the following content from reference URLs" in text:
+            return json.dumps({"summary": filler(120, "style")})
+        if "article outline" in text:
+            return json.dumps({
+                "title": "Benchmark Article",
+                "outlines": [{"section": f"Section {i}", "description": filler(30, f"d{i}")} for i in range(BENCH_SECTIONS)],
+                "follow_up_question": "Does this outline work for you?",
+            })
+        if "You are writing ONE section" in text:
+            section = _between(text, "<section>", "</section>").strip() or "Section"
+            return json.dumps({
+                "content": f"## {section}\n\n{filler(BENCH_SECTION_WORDS, section)}",
+                "citations": [{"title": f"Source {section}", "url": f"https://example.com/{hashlib.sha1(section.encode()).hexdigest()[:12]}"}],
+            })
+        if "You are the editor assembling" in text:
+            return json.dumps({
+                "introduction": filler(80, "intro"),
+                "transitions": [filler(15, f"t{i}") for i in range(BENCH_SECTIONS + 1)],
+                "follow_up_question": "Anything to change?",
+            })
+        body = "\n\n".join(f"## Section {i}\n\n{filler(BENCH_SECTION_WORDS, str(i))}" for i in range(BENCH_SECTIONS))
+        return json.dumps({
+            "title": "Benchmark Article",
+            "content": f"# Benchmark Article\n\n{body}",
+            "citations": [{"title": "Source", "url": "https://example.com/source"}],
+            "follow_up_question": "Anything to change?",
+        })
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        text = "\n".join(str(m.content) for m in messages)
+        content = self._respond(text)
+        usage = {"input_tokens": len(text) // 4, "output_tokens": len(content) // 4,
+                 "total_tokens": (len(text) + len(content)) // 4}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._check_pool(self.http_client)
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._check_pool(self.http_async_client)
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any):
+        self._check_pool(self.http_async_client)
+        content = self._result(messages).generations[0].message.content
+        step = max(1, len(content) // 20)
+        for i in range(0, len(content), step):
+            await asyncio.sleep(self.latency / 20)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + step]))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def chat_model(http_client: Any = None, http_async_client: Any = None) -> StubChatModel:
+    """Stand-in for model_config._chat_model: model_config.get_llm still decides when to (re)build."""
+    from utils.llm_cache import llm_cache
+    return StubChatModel(http_client=http_client, http_async_client=http_async_client,
+                         cache=llm_cache, callbacks=[LLMCallMetrics("deepseek")])
+
+
+def _search_results(query: str, max_results: int) -> List[Dict]:
+    words = BENCH_SEARCH_CONTENT_KB * 1024 // 8
+    return [{
+        "title": f"{query} result {i}",
+        "url": f"https://example.com/{hashlib.sha1(f'{query}{i}'.encode()).hexdigest()[:12]}",
+        "content": filler(words, f"{query}{i}"),
+        "score": None,
+        "published_date": "",
+    } for i in range(max_results)]
+
+
+async def aperplexity_search(query: str, max_results: int = 1, timeout: Optional[float] = None, use_cache: bool = True) -> List[Dict]:
+    with track_call("perplexity", "search"):
+        await asyncio.sleep(BENCH_SEARCH_LATENCY_MS / 1000)
+    return _search_results(query, max_results)
+
+
+async def aperplexity_search_batch(queries: List[str], max_results: int = 1, timeout: Optional[float] = None) -> List[Optional[List[Dict]]]:
+    with track_call("perplexity", "search_batch"):
+        await asyncio.sleep(BENCH_SEARCH_LATENCY_MS / 1000)
+    return [_search_results(q, max_results) for q in queries]
+
+
+def _pages(urls: List[str]) -> str:
+    words = BENCH_PAGE_KB * 1024 // 8
+    return "\n\n".join(f"URL: {url}\nContent: {filler(words, url)}" for url in urls)
+
+
+async def aload_content_from_urls(urls: List[str], session_id: Optional[str] = None) -> str:
+    await asyncio.sleep(BENCH_FETCH_LATENCY_MS / 1000)
+    return _pages(urls)
+
+
+def _image_blobs(number_of_images: int) -> List[str]:
+    from utils.blobs import blob_store
+    hashes = []
+    for _ in range(number_of_images):
+        # unique bytes per call, like a real generation; incompressible like PNG data
+        payload = os.urandom(BENCH_IMAGE_KB * 1024)
+        hashes.append(blob_store.put(b"\x89PNG\r\n\x1a\n" + payload, "image/png"))
+    return hashes
+
+
+async def agenerate_images(title: str, tone: str, target_audience: str, number_of_images: int = 1,
+                           user_feedback: str = "", previous_image_bytes: bytes = None):
+    with track_call("gemini", "generate_images"):
+        await asyncio.sleep(BENCH_IMAGE_LATENCY_MS / 1000)
+    return await asyncio.to_thread(_image_blobs, number_of_images), f"image for {title}"
+
+
+def install():
+    """
+    Swap the provider entry points for the stubs above. Modules that
+    imported a provider function by name are patched as well.
+    """
+    import utils.tools as tools
+    import utils.model_config as model_config
+
+    model_config._chat_model = chat_model
+    model_config.agenerate_images = agenerate_images
+    tools.aperplexity_search = aperplexity_search
+    tools.aperplexity_search_batch = aperplexity_search_batch
+    tools.aload_content_from_urls = aload_content_from_urls
+
+    import src.nodes as nodes
+    import src.main as main
+
+    nodes.agenerate_images = agenerate_images
+    nodes.aload_content_from_urls = aload_content_from_urls
+    main.agenerate_images = agenerate_images
+    logger.info("[BENCH] Stubs installed | llm=%sms search=%sms fetch=%sms image=%sms",
+                BENCH_LLM_LATENCY_MS, BENCH_SEARCH_LATENCY_MS, BENCH_FETCH_LATENCY_MS, BENCH_IMAGE_LATENCY_MS)
+    return main
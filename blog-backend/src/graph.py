@@ -1,9 +1,9 @@
 from pydantic import BaseModel
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, END
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 import logging
 
+from utils.checkpoint import get_checkpointer
 from src.nodes import (
     search_articles_citations_node,
     extract_writing_style_node,
@@ -25,6 +25,7 @@ class State(BaseModel):
     target_audience: Optional[str] = ""
     user_feedback: Optional[str] = ""
     keywords: Optional[str] = ""
+    # article content and image bytes live in the blob store (utils.blobs); state keeps their hashes
     articles: Optional[List[Dict[str, Any]]] = None
     citations: Optional[List[Dict[str, Any]]] = None
     outlines_json: Optional[Dict[str, Any]] = None
@@ -32,15 +33,20 @@ class State(BaseModel):
     follow_up_question: Optional[str] = ""
     routing_decision: Optional[str] = None
     current_stage: str = "start"
-    generated_images: Optional[List[str]] = None
+    image_hashes: Optional[List[str]] = None
     image_prompt: Optional[str] = ""
     image_count: Optional[int] = 0
+    image_title: Optional[str] = ""
     reference_urls: Optional[List[str]] = None
     custom_urls: Optional[List[str]] = None
     writing_style: Optional[str] = ""
+    bypass_search_cache: Optional[bool] = False
 
-def route_entry(state: State) -> str:
-    """Entry point router that decides where to start based on current state."""
+def route_entry(state: State) -> Union[str, List[str]]:
+    """
+    Entry point router that decides where to start based on current state.
+    A new workflow fans out to search and extract_writing_style, which run concurrently.
+    """
     logger.info("[GRAPH] route_entry called")
     logger.info("[GRAPH] State: topic=%s, keywords=%s, outlines=%s, draft=%s, feedback=%s, stage=%s",
                 bool(state.topic), bool(state.keywords), bool(state.outlines_json), 
@@ -57,15 +63,22 @@ def route_entry(state: State) -> str:
             return "outline_router"
     
     if state.keywords and state.topic:
-        logger.info("[GRAPH] Routing to search (new workflow with user keywords)")
-        return "search"
+        logger.info("[GRAPH] Routing to search + extract_writing_style in parallel (new workflow with user keywords)")
+        return ["search", "extract_writing_style"]
     
     logger.info("[GRAPH] No action needed, ending")
     return "end"
 
 
-def route_after_outline(state: State) -> str:
+def route_after_outline(state: State) -> Union[str, List[str]]:
+    """
+    On approval, start the hero image alongside the article: both only need the
+    approved outline's title, tone and target audience.
+    """
     decision = state.routing_decision
+    if decision == "write_sections":
+        logger.info("[Graph] route_after_outline -> write_sections + generate_images in parallel")
+        return ["write_sections", "generate_images"]
     logger.info(f"[Graph] route_after_outline -> {decision}")
     return decision
 
@@ -74,7 +87,7 @@ def route_after_article(state: State) -> str:
     logger.info(f"[Graph] route_after_article -> {decision}")
     return decision
 
-memory = MemorySaver()
+memory = get_checkpointer()
 workflow = StateGraph(State)
 
 workflow.add_node("search", search_articles_citations_node)
@@ -89,23 +102,32 @@ workflow.set_conditional_entry_point(
     route_entry,
     {
         "search": "search",
+        "extract_writing_style": "extract_writing_style",
         "outline_router": "outline_router",
         "article_router": "article_router",
         "end": END,
     },
 )
 
-workflow.add_edge("search", "extract_writing_style")
-workflow.add_edge("extract_writing_style", "generate_outlines")
+# search and extract_writing_style run in the same step and write disjoint
+# state keys (articles/citations/current_stage vs writing_style), so their
+# updates merge without conflicts. generate_outlines waits for both.
+workflow.add_edge(["search", "extract_writing_style"], "generate_outlines")
 workflow.add_edge("generate_outlines", END) 
 
+# generate_images also runs after every write_sections; it is a no-op when the
+# image was already generated (early, or by a previous draft) for the same title.
 workflow.add_edge("write_sections", "generate_images")
 workflow.add_edge("generate_images", END)  
 
 workflow.add_conditional_edges(
     "outline_router",
     route_after_outline,
-    {"generate_outlines": "generate_outlines", "write_sections": "write_sections"},
+    {
+        "generate_outlines": "generate_outlines",
+        "write_sections": "write_sections",
+        "generate_images": "generate_images",
+    },
 )
 
 workflow.add_conditional_edges(
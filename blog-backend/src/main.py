@@ -1,39 +1,48 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
+import asyncio
 import logging
 import os
-from logging.handlers import RotatingFileHandler
 from time import perf_counter
-from src.graph import app as graph_app
-from typing import Optional, List
-from utils.model_config import generate_images
-import base64
-import re
-
-def _setup_logging():
-    root = logging.getLogger()
-    root.setLevel(logging.INFO)
-    if not any(isinstance(h, logging.StreamHandler) for h in root.handlers):
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        ch.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
-        root.addHandler(ch)
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
-    os.makedirs(logs_dir, exist_ok=True)
-    log_path = os.path.join(logs_dir, "app.log")
-    if not any(isinstance(h, RotatingFileHandler) and getattr(h, 'baseFilename', '') == log_path for h in root.handlers):
-        fh = RotatingFileHandler(log_path, maxBytes=2_000_000, backupCount=5, encoding="utf-8")
-        fh.setLevel(logging.INFO)
-        fh.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
-        root.addHandler(fh)
-
-_setup_logging()
+from src.graph import app as graph_app, memory as checkpointer
+from typing import Optional, List, Tuple
+from utils.model_config import agenerate_images
+from utils.clients import registry
+from utils.cache import cache_stats
+from utils.checkpoint import CHECKPOINT_DURABILITY, CHECKPOINT_SESSION_TTL
+from utils.blobs import blob_store, blob_url
+from utils.compression import CompressionMiddleware
+from utils.intent import decision_counters
+from utils.token_budget import token_usage
+from utils.llm_cache import llm_cache
+from utils.logging_setup import setup_logging
+from utils.metrics import Gauge, MetricsMiddleware, registry as metrics_registry, track_session
+from utils.tracing import TRACE_SAMPLE_RATE, span, trace_request, trace_store, traced_endpoint
+import json
+import hashlib
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="Blog Generator")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if blob_store.ttl is not None and (not CHECKPOINT_SESSION_TTL or blob_store.ttl < CHECKPOINT_SESSION_TTL):
+        logger.warning("[BLOBS] BLOB_TTL (%ds) is shorter than CHECKPOINT_SESSION_TTL (%s): live sessions can lose "
+                       "their images and article content, which are then regenerated or refetched",
+                       blob_store.ttl, f"{CHECKPOINT_SESSION_TTL:.0f}s" if CHECKPOINT_SESSION_TTL else "no expiry")
+    registry.start()
+    try:
+        yield
+    finally:
+        await registry.aclose()
+
+
+app = FastAPI(title="Blog Generator", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,10 +50,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-State-Version"],
 )
+app.add_middleware(CompressionMiddleware, min_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")))
+app.add_middleware(MetricsMiddleware)
+
+metrics_registry.register(Gauge(
+    "blog_sessions_stored", "Sessions held by the checkpointer.",
+    callback=lambda: {(): checkpointer.stats()["sessions"]},
+))
+
 
+class ResponseOptions(BaseModel):
+    """Response shaping shared by the endpoints returning a GenerateResponse (the final event when streamed)."""
+    fields: Optional[List[str]] = None  # include only these GenerateResponse fields
+    delta: Optional[bool] = False  # include only fields changed by this request
 
-class GenerateRequest(BaseModel):
+
+class GenerateRequest(ResponseOptions):
     session_id: str
     topic: str
     keywords: str
@@ -54,12 +77,13 @@ class GenerateRequest(BaseModel):
     target_audience: Optional[str] = None
     reference_urls: Optional[List[str]] = None
     custom_urls: Optional[List[str]] = None
+    bypass_search_cache: Optional[bool] = False
 
-class UserInputRequest(BaseModel):
+class UserInputRequest(ResponseOptions):
     session_id: str
     user_feedback: str
 
-class ImageRegenerateRequest(BaseModel):
+class ImageRegenerateRequest(ResponseOptions):
     session_id: str
     image_feedback: str
 
@@ -68,33 +92,35 @@ class GenerateResponse(BaseModel):
     session_id: str
     current_stage: str
     keywords: Optional[str] = None
-    articles: Optional[list] = None
+    articles: Optional[list] = None  # content is served from /blobs/: content_hash + content_url
     citations: Optional[list] = None
     outlines_json: Optional[dict] = None
     draft_article: Optional[dict] = None
     follow_up_question: Optional[str] = None
-    generated_images: Optional[list] = None
+    generated_images: Optional[list] = None  # URLs under /blobs/
     image_prompt: Optional[str] = None
     image_count: Optional[int] = 0
 
 
-def _get_graph_response(session_id: str) -> GenerateResponse:
-    """Helper to fetch the current state and format it as a GenerateResponse."""
-    config = {"configurable": {"thread_id": session_id}}
-    st = graph_app.get_state(config)
-    values = st.values
+def _article_view(article: dict) -> dict:
+    if article.get("content_hash"):
+        return {**article, "content_url": blob_url(article["content_hash"])}
+    return article
 
+
+def _response_from_values(session_id: str, values: dict) -> GenerateResponse:
     current_stage = values.get("current_stage") or "start"
+    articles = values.get("articles")
 
     return GenerateResponse(
         status="success",
         session_id=session_id,
         current_stage=current_stage,
         keywords=values.get("keywords"),
-        generated_images=values.get("generated_images"),
+        generated_images=[blob_url(h) for h in values.get("image_hashes") or []],
         image_prompt=values.get("image_prompt"),
         image_count=values.get("image_count", 0),
-        articles=values.get("articles"),
+        articles=[_article_view(a) for a in articles] if articles is not None else None,
         citations=values.get("citations"),
         outlines_json=values.get("outlines_json"),
         draft_article=values.get("draft_article"),
@@ -102,8 +128,164 @@ def _get_graph_response(session_id: str) -> GenerateResponse:
     )
 
 
+async def _get_state_response(session_id: str) -> Tuple[GenerateResponse, str]:
+    """Current state as a GenerateResponse, plus its version (the latest checkpoint id)."""
+    config = {"configurable": {"thread_id": session_id}}
+    with span("checkpoint.get_state", "internal"):
+        st = await graph_app.aget_state(config)
+    version = (st.config or {}).get("configurable", {}).get("checkpoint_id") or "empty"
+    return _response_from_values(session_id, st.values), version
+
+
+async def _get_graph_response(session_id: str) -> GenerateResponse:
+    """Helper to fetch the current state and format it as a GenerateResponse."""
+    response, _ = await _get_state_response(session_id)
+    return response
+
+
+_ALWAYS_INCLUDED = {"status", "session_id", "current_stage"}
+
+
+def _validate_fields(fields: Optional[List[str]]):
+    unknown = set(fields or []) - set(GenerateResponse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown response fields: {sorted(unknown)}")
+
+
+def _state_etag(version: str, fields: Optional[List[str]]) -> str:
+    projection = ",".join(sorted(fields)) if fields else "*"
+    return f'"{version}:{hashlib.sha1(projection.encode("utf-8")).hexdigest()[:8]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check: the header may be `*` or a comma-separated list of
+    ETags, compared weakly (a W/ prefix on either side is ignored), so a body
+    re-encoded by CompressionMiddleware still revalidates.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _shape_body(
+    response: GenerateResponse,
+    fields: Optional[List[str]] = None,
+    previous: Optional[GenerateResponse] = None,
+) -> dict:
+    """
+    A GenerateResponse as a dict with only the requested fields:
+    - fields: projection onto these fields
+    - previous: delta mode, only fields whose value differs from previous
+    status, session_id and current_stage are always included.
+    """
+    body = response.model_dump()
+    include = set(fields) if fields else set(body)
+    if previous is not None:
+        before = previous.model_dump()
+        include = {k for k in include if body[k] != before.get(k)}
+    return {k: v for k, v in body.items() if k in include or k in _ALWAYS_INCLUDED}
+
+
+def _shape_response(
+    response: GenerateResponse,
+    version: str,
+    fields: Optional[List[str]] = None,
+    previous: Optional[GenerateResponse] = None,
+) -> JSONResponse:
+    """
+    Render a GenerateResponse shaped by _shape_body. The state version is
+    returned in X-State-Version; full (non-delta) bodies also get an ETag
+    usable with GET /session/{session_id}.
+    """
+    body = _shape_body(response, fields, previous)
+    headers = {"X-State-Version": version}
+    if previous is None:
+        headers["ETag"] = _state_etag(version, fields)
+    return JSONResponse(content=body, headers=headers)
+
+
+def _generate_inputs(req: GenerateRequest) -> dict:
+    return {
+        "topic": req.topic,
+        "keywords": req.keywords,
+        "tone": req.tone,
+        "length": req.length,
+        "num_outlines": req.num_outlines,
+        "target_audience": req.target_audience,
+        "reference_urls": req.reference_urls,
+        "custom_urls": req.custom_urls,
+        "bypass_search_cache": req.bypass_search_cache,
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _stream_graph(
+    endpoint: str,
+    inputs: dict,
+    session_id: str,
+    fields: Optional[List[str]] = None,
+    delta: Optional[bool] = False,
+):
+    """
+    Run the graph with astream_events and relay it as Server-Sent Events:
+    - start: sent immediately
+    - node_start / node_end: one pair per graph node (node_end lists the state keys it updated)
+    - token: LLM output chunks as they arrive, tagged with the node that produced them
+    - final: the same GenerateResponse the blocking endpoint returns, shaped by fields / delta
+    - error: if the run fails
+    Events are forwarded one at a time and nothing is buffered, so memory stays
+    at the level of the blocking path.
+    """
+    start = perf_counter()
+    config = {"configurable": {"thread_id": session_id}}
+    node_names = set(graph_app.nodes) - {"__start__"}
+    logger.info("[API %s] STREAM START | session_id=%s", endpoint, session_id)
+    yield _sse("start", {"session_id": session_id})
+    try:
+        previous = (await _get_state_response(session_id))[0] if delta else None
+        with trace_request(endpoint, session_id), track_session(session_id):
+            async for event in graph_app.astream_events(inputs, config=config, version="v2", durability=CHECKPOINT_DURABILITY):
+                kind = event["event"]
+                name = event.get("name")
+                node = (event.get("metadata") or {}).get("langgraph_node")
+                if kind == "on_chain_start" and name in node_names and name == node:
+                    yield _sse("node_start", {"node": node, "elapsed_ms": int((perf_counter() - start) * 1000)})
+                elif kind == "on_chain_end" and name in node_names and name == node:
+                    output = (event.get("data") or {}).get("output")
+                    updated = sorted(output.keys()) if isinstance(output, dict) else []
+                    yield _sse("node_end", {"node": node, "updated": updated, "elapsed_ms": int((perf_counter() - start) * 1000)})
+                elif kind == "on_chat_model_stream":
+                    chunk = (event.get("data") or {}).get("chunk")
+                    text = getattr(chunk, "content", "")
+                    if text:
+                        yield _sse("token", {"node": node, "run_id": event.get("run_id"), "text": text})
+        response = await _get_graph_response(session_id)
+        yield _sse("final", _shape_body(response, fields, previous))
+        logger.info("[API %s] STREAM SUCCESS | duration_ms=%d", endpoint, int((perf_counter() - start) * 1000))
+    except Exception as e:
+        logger.exception("[API %s] STREAM FAILED | duration_ms=%d | error=%s",
+                         endpoint, int((perf_counter() - start) * 1000), str(e))
+        yield _sse("error", {"detail": str(e)})
+
+
+def _sse_response(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/generate", response_model=GenerateResponse)
-def generate(req: GenerateRequest):
+@traced_endpoint("/generate")
+async def generate(req: GenerateRequest):
     """
     Endpoint 1: /generate
     - Takes: topic, tone, length
@@ -118,30 +300,21 @@ def generate(req: GenerateRequest):
     logger.info("[API /generate] Request - topic='%s', keywords='%s', tone='%s', length='%s', num_outlines='%s', target_audience='%s', reference_urls=%s, custom_urls=%s", 
                 req.topic, req.keywords, req.tone, req.length, req.num_outlines, req.target_audience, req.reference_urls, req.custom_urls)
     
+    _validate_fields(req.fields)
     try:
-        graph_app.invoke(
-            {
-                "topic": req.topic,
-                "keywords": req.keywords,
-                "tone": req.tone,
-                "length": req.length,
-                "num_outlines": req.num_outlines,
-                "target_audience": req.target_audience,
-                "reference_urls": req.reference_urls,
-                "custom_urls": req.custom_urls,
-            },
-            config=config,
-        )
+        previous = (await _get_state_response(req.session_id))[0] if req.delta else None
+        with track_session(req.session_id):
+            await graph_app.ainvoke(_generate_inputs(req), config=config, durability=CHECKPOINT_DURABILITY)
         duration_ms = int((perf_counter() - start) * 1000)
         
-        response = _get_graph_response(req.session_id)
+        response, version = await _get_state_response(req.session_id)
         
         logger.info("[API /generate] Response - stage=%s, has_outlines=%s", 
                     response.current_stage, bool(response.outlines_json))
         logger.info("[API /generate] SUCCESS | duration_ms=%d", duration_ms)
         logger.info("="*100)
         
-        return response
+        return _shape_response(response, version, req.fields, previous)
     except Exception as e:
         duration_ms = int((perf_counter() - start) * 1000)
         logger.exception("[API /generate] FAILED | duration_ms=%d | error=%s", duration_ms, str(e))
@@ -149,7 +322,8 @@ def generate(req: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/user_input", response_model=GenerateResponse)
-def user_input(req: UserInputRequest):
+@traced_endpoint("/user_input")
+async def user_input(req: UserInputRequest):
     """
     Endpoint 2: /user_input
     - Takes: user_feedback (for router node decision)
@@ -164,23 +338,27 @@ def user_input(req: UserInputRequest):
     logger.info("[API /user_input] START | session_id=%s", req.session_id)
     logger.info("[API /user_input] Request - feedback='%s'", req.user_feedback)
 
+    _validate_fields(req.fields)
     try:
-        graph_app.invoke(
-            {
-                "user_feedback": req.user_feedback,
-            },
-            config=config,
-        )
+        previous = (await _get_state_response(req.session_id))[0] if req.delta else None
+        with track_session(req.session_id):
+            await graph_app.ainvoke(
+                {
+                    "user_feedback": req.user_feedback,
+                },
+                config=config,
+                durability=CHECKPOINT_DURABILITY,
+            )
         duration_ms = int((perf_counter() - start) * 1000)
         
-        response = _get_graph_response(req.session_id)
+        response, version = await _get_state_response(req.session_id)
         
         logger.info("[API /user_input] Response - stage=%s, has_draft=%s", 
                     response.current_stage, bool(response.draft_article))
         logger.info("[API /user_input] SUCCESS | duration_ms=%d", duration_ms)
         logger.info("="*100)
         
-        return response
+        return _shape_response(response, version, req.fields, previous)
     except Exception as e:
         duration_ms = int((perf_counter() - start) * 1000)
         logger.exception("[API /user_input] FAILED | duration_ms=%d | error=%s", duration_ms, str(e))
@@ -188,8 +366,27 @@ def user_input(req: UserInputRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/generate/stream")
+async def generate_stream(req: GenerateRequest):
+    """Streaming variant of /generate (text/event-stream). See _stream_graph for the event types."""
+    logger.info("[API /generate/stream] Request - topic='%s', keywords='%s', session_id=%s",
+                req.topic, req.keywords, req.session_id)
+    _validate_fields(req.fields)
+    return _sse_response(_stream_graph("/generate/stream", _generate_inputs(req), req.session_id, req.fields, req.delta))
+
+
+@app.post("/user_input/stream")
+async def user_input_stream(req: UserInputRequest):
+    """Streaming variant of /user_input (text/event-stream). See _stream_graph for the event types."""
+    logger.info("[API /user_input/stream] Request - feedback='%s', session_id=%s", req.user_feedback, req.session_id)
+    _validate_fields(req.fields)
+    return _sse_response(_stream_graph("/user_input/stream", {"user_feedback": req.user_feedback}, req.session_id,
+                                       req.fields, req.delta))
+
+
 @app.post("/regenerate_image", response_model=GenerateResponse)
-def regenerate_image(req: ImageRegenerateRequest):
+@traced_endpoint("/regenerate_image")
+async def regenerate_image(req: ImageRegenerateRequest):
     """
     Endpoint 3: /regenerate_image
     - Takes: image_feedback (user's feedback for image regeneration)
@@ -203,55 +400,56 @@ def regenerate_image(req: ImageRegenerateRequest):
     logger.info("[API /regenerate_image] START | session_id=%s", req.session_id)
     logger.info("[API /regenerate_image] Request - feedback='%s'", req.image_feedback)
 
+    _validate_fields(req.fields)
     try:
-        st = graph_app.get_state(config)
+        st = await graph_app.aget_state(config)
         values = st.values        
         draft_article = values.get("draft_article") or {}
         title = draft_article.get("title", values.get("topic", ""))
         tone = values.get("tone", "")
         target_audience = values.get("target_audience", "")
-        previous_images = values.get("generated_images", [])
+        previous_images = values.get("image_hashes") or []
         previous_image_bytes = None
         if previous_images:
-            previous_image = previous_images[0]
-            if previous_image.startswith('data:image'):
-                match = re.search(r'base64,(.+)', previous_image)
-                if match:
-                    previous_image_b64 = match.group(1)
-                    previous_image_bytes = base64.b64decode(previous_image_b64)
-                    logger.info(f"[API /regenerate_image] Extracted {len(previous_image_bytes)} bytes from previous image")
+            previous_blob = await asyncio.to_thread(blob_store.get, previous_images[0])
+            if previous_blob:
+                previous_image_bytes = previous_blob[0]
+                logger.info(f"[API /regenerate_image] Loaded {len(previous_image_bytes)} bytes of previous image from blob store")
             else:
-                previous_image_bytes = base64.b64decode(previous_image)
-                logger.info(f"[API /regenerate_image] Decoded {len(previous_image_bytes)} bytes from previous image")
+                logger.warning("[API /regenerate_image] Previous image %s was swept from the blob store, "
+                               "generating a new one from the prompt and feedback", previous_images[0])
         
         logger.info("[API /regenerate_image] Regenerating image with feedback and previous image")
-        base64_images, formatted_prompt = generate_images(
-            title=title,
-            tone=tone,
-            target_audience=target_audience,
-            number_of_images=1,
-            user_feedback=req.image_feedback,
-            previous_image_bytes=previous_image_bytes
-        )
+        with track_session(req.session_id):
+            image_hashes, formatted_prompt = await agenerate_images(
+                title=title,
+                tone=tone,
+                target_audience=target_audience,
+                number_of_images=1,
+                user_feedback=req.image_feedback,
+                previous_image_bytes=previous_image_bytes
+            )
         
-        graph_app.update_state(
+        await graph_app.aupdate_state(
             config,
             {
-                "generated_images": base64_images,
+                "image_hashes": image_hashes,
                 "image_prompt": formatted_prompt,
-                "image_count": len(base64_images)
+                "image_count": len(image_hashes),
+                "image_title": title
             }
         )
         
         duration_ms = int((perf_counter() - start) * 1000)
         
-        response = _get_graph_response(req.session_id)
+        response, version = await _get_state_response(req.session_id)
+        previous = _response_from_values(req.session_id, values) if req.delta else None
         
-        logger.info("[API /regenerate_image] Response - image_count=%d", len(base64_images))
+        logger.info("[API /regenerate_image] Response - image_count=%d", len(image_hashes))
         logger.info("[API /regenerate_image] SUCCESS | duration_ms=%d", duration_ms)
         logger.info("="*100)
         
-        return response
+        return _shape_response(response, version, req.fields, previous)
     except Exception as e:
         duration_ms = int((perf_counter() - start) * 1000)
         logger.exception("[API /regenerate_image] FAILED | duration_ms=%d | error=%s", duration_ms, str(e))
@@ -259,5 +457,90 @@ def regenerate_image(req: ImageRegenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/session/{session_id}", response_model=GenerateResponse)
+async def get_session(session_id: str, request: Request, fields: Optional[str] = None):
+    """
+    Current state of a session, optionally projected onto a comma-separated
+    list of fields. Answers 304 when If-None-Match matches the state's ETag.
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    _validate_fields(field_list)
+    response, version = await _get_state_response(session_id)
+    etag = _state_etag(version, field_list)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "X-State-Version": version})
+    return _shape_response(response, version, field_list)
+
+
+@app.get("/blobs/{blob_hash}")
+async def get_blob(blob_hash: str, request: Request):
+    """
+    Serve a blob (generated image, article content) by its sha256 hash.
+    Blobs are immutable, so clients may cache them forever.
+    """
+    etag = f'"{blob_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    blob = await asyncio.to_thread(blob_store.get, blob_hash)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    data, content_type = blob
+    return Response(content=data, media_type=content_type, headers=headers)
+
+
+@app.get("/stats/clients")
+def client_stats():
+    """Connection pool usage per external provider (Perplexity, Gemini, DeepSeek)."""
+    return registry.stats()
+
+
+@app.get("/stats/checkpointer")
+def checkpointer_stats():
+    """Sessions held by the checkpointer, their serialized size and eviction counters."""
+    return checkpointer.stats()
+
+
+@app.get("/stats/router")
+def router_stats():
+    """APPROVE/EDIT decisions per router, by source: local fast path (rule) or LLM."""
+    return decision_counters.stats()
+
+
+@app.get("/stats/tokens")
+def tokens_stats():
+    """LLM calls and prompt/completion tokens per node since startup."""
+    return token_usage.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics for this worker: node / provider latency histograms, in-flight gauges, token counters."""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/trace/{session_id}")
+def debug_trace(session_id: str, limit: int = 1):
+    """
+    Latest traces of a session recorded by this worker: span tree, critical
+    path and the split of the critical path between waiting on external calls
+    and local computing.
+    """
+    traces = trace_store.for_session(session_id, limit)
+    if not traces:
+        hint = "" if TRACE_SAMPLE_RATE > 0 else " (tracing is off; set TRACE_SAMPLE_RATE)"
+        raise HTTPException(status_code=404, detail=f"No traces for session {session_id}{hint}")
+    return {"session_id": session_id, "traces": traces}
+
+
+@app.get("/stats/caches")
+def caches_stats():
+    """Entry counts and hit/miss counters for every in-process cache."""
+    stats = cache_stats()
+    if llm_cache is not None:
+        stats["llm_calls"] = llm_cache.stats()
+    return stats
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -1,19 +1,55 @@
+import os
+import asyncio
 import logging
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langsmith import traceable
 
-from utils.model_config import get_llm, generate_images
-from utils.tools import search_articles_parallel, load_content_from_urls
+from utils.model_config import get_llm, agenerate_images
+from utils.blobs import ablobs_present, astash_articles, aload_articles
+from utils.cache import TTLCache, make_key
+from utils.metrics import instrument_node
+from utils.logging_setup import log_payload, prompt_payload
+from utils.retrieval import PassageIndex, RETRIEVAL_TOP_K, format_passages
+from utils.intent import classify_feedback, decision_counters
+from utils.token_budget import fit_prompt, token_usage
+from utils.tools import (
+    SEARCH_MODE,
+    asearch_articles_batched,
+    asearch_articles_parallel,
+    aload_content_from_urls,
+)
 from utils.prompts import (
     outlines_prompt,
     write_sections_prompt,
+    write_section_prompt,
+    assemble_article_prompt,
     router_prompt,
     writing_style_prompt,
 )
 logger = logging.getLogger(__name__)
-llm = get_llm()
+
+# "parallel" writes each outline section concurrently, "single" asks for the whole article at once.
+WRITE_SECTIONS_MODE = os.getenv("WRITE_SECTIONS_MODE", "parallel").lower()
+WRITE_SECTIONS_CONCURRENCY = int(os.getenv("WRITE_SECTIONS_CONCURRENCY", "4"))
+WRITE_SECTIONS_PARALLEL_MIN_SECTIONS = int(os.getenv("WRITE_SECTIONS_PARALLEL_MIN_SECTIONS", "4"))
+# Settle clear approvals / edit requests locally and call the LLM router only for ambiguous replies.
+ROUTER_FAST_PATH = os.getenv("ROUTER_FAST_PATH", "true").lower() == "true"
+# Reference URL sets seen within this many seconds reuse their writing style without refetching.
+WRITING_STYLE_FRESH_FOR = float(os.getenv("WRITING_STYLE_FRESH_FOR", "3600"))
+
+# Writing-style summaries keyed by reference content fingerprint ("style:<fp>"), plus the
+# last fingerprint seen for each sorted reference URL set ("urls:<key>").
+writing_style_cache = TTLCache(
+    "writing_style",
+    ttl=float(os.getenv("WRITING_STYLE_CACHE_TTL", str(30 * 24 * 3600))),
+    max_entries=int(os.getenv("WRITING_STYLE_CACHE_MAX_ENTRIES", "256")),
+    path=os.getenv("WRITING_STYLE_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "writing_style.sqlite")) or None,
+    disk_max_bytes=int(os.getenv("WRITING_STYLE_CACHE_DISK_MAX_MB", "16")) * 1024 * 1024,
+)
 
 
 def _coerce_json(text: str) -> Dict[str, Any]:
@@ -34,8 +70,44 @@ def _coerce_json(text: str) -> Dict[str, Any]:
             return {"text": text}
 
 
+def _session_id(config: Optional[RunnableConfig]) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+async def _load_sources(
+    articles: Optional[List[Dict[str, Any]]],
+    session_id: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    state.articles with their content loaded from the blob store. Articles whose
+    blob was swept are fetched again from their url(s); those that still have no
+    content are dropped. Returns (articles, refetched): when refetched is True the
+    caller should stash the articles back into the state.
+    """
+    loaded = await aload_articles(articles)
+    missing = [a for a in loaded if a.get("content_missing")]
+    if not missing:
+        return loaded, False
+    logger.warning("[SOURCES] %d/%d article blobs missing, refetching from their URLs", len(missing), len(loaded))
+
+    async def _refetch(article: Dict[str, Any]):
+        urls = [u.strip() for u in (article.get("url") or "").split(",") if u.strip()]
+        content = await aload_content_from_urls(urls, session_id=session_id) if urls else ""
+        if content:
+            article["content"] = content
+            article.pop("content_missing", None)
+            article.pop("content_hash", None)
+
+    await asyncio.gather(*(_refetch(a) for a in missing))
+    dropped = [a.get("url") for a in loaded if a.get("content_missing")]
+    if dropped:
+        logger.warning("[SOURCES] Dropping %d articles that could not be refetched: %s", len(dropped), dropped)
+    return [a for a in loaded if not a.get("content_missing")], True
+
+
 @traceable(name="search_articles_citations_node")
-def search_articles_citations_node(state):
+@instrument_node("search_articles_citations")
+async def search_articles_citations_node(state, config: RunnableConfig = None):
     """Node 1: Search web articles for each keyword and merge custom URL content"""
     logger.info("="*80)
     logger.info("[NODE 1 - SEARCH_ARTICLES] START")
@@ -44,12 +116,18 @@ def search_articles_citations_node(state):
     kw_string = state.keywords or state.topic
     queries = [kw.strip() for kw in kw_string.split(',') if kw.strip()]
     
-    articles = search_articles_parallel(queries, max_results=1)
+    use_cache = not getattr(state, 'bypass_search_cache', False)
+    if not use_cache:
+        logger.info("[NODE 1] Bypassing search cache for fresh results")
+    if SEARCH_MODE == "batch":
+        articles = await asearch_articles_batched(queries, max_results=1, use_cache=use_cache)
+    else:
+        articles = await asearch_articles_parallel(queries, max_results=1, use_cache=use_cache)
     logger.info("[NODE 1] Retrieved %d articles from search", len(articles))
     custom_urls = getattr(state, 'custom_urls', None)
     if custom_urls:
         logger.info("[NODE 1] Loading content from %d custom URLs", len(custom_urls))
-        custom_content = load_content_from_urls(custom_urls)
+        custom_content = await aload_content_from_urls(custom_urls, session_id=_session_id(config))
         if custom_content:
             articles.append({
                 "title": f"Custom URLs Content ({len(custom_urls)} sources)",
@@ -65,14 +143,32 @@ def search_articles_citations_node(state):
     logger.info("="*80)
     
     return {
-        "articles": articles,
+        "articles": await astash_articles(articles),
         "citations": [],
         "current_stage": "search",
     }
 
 
+async def _summarize_writing_style(reference_content: str) -> str:
+    prompt = ChatPromptTemplate.from_template(writing_style_prompt.template)
+    chain = prompt | get_llm()
+    
+    prompt_vars = fit_prompt("extract_writing_style", writing_style_prompt.template, {},
+                             {"reference_content": [reference_content]})
+    
+    logger.info("[NODE 1.5] LLM Call - Extracting writing style")
+    out = await chain.ainvoke(prompt_vars)
+    token_usage.record("extract_writing_style", out)
+    
+    log_payload(logger, "[NODE 1.5] LLM Response - Raw output:", out.content)
+    
+    parsed = _coerce_json(out.content)
+    return parsed.get("summary", json.dumps(parsed, indent=2, ensure_ascii=False))
+
+
 @traceable(name="extract_writing_style_node")
-def extract_writing_style_node(state):
+@instrument_node("extract_writing_style")
+async def extract_writing_style_node(state, config: RunnableConfig = None):
     """Node 1.5: Extract writing style from reference URLs"""
     logger.info("="*80)
     logger.info("[NODE 1.5 - EXTRACT_WRITING_STYLE] START")
@@ -84,8 +180,20 @@ def extract_writing_style_node(state):
         logger.info("="*80)
         return {"writing_style": ""}
     
-    logger.info("[NODE 1.5] Loading content from %d reference URLs", len(reference_urls))
-    reference_content = load_content_from_urls(reference_urls)
+    urls = sorted(set(reference_urls))
+    urls_key = "urls:" + make_key(urls)
+    seen = await writing_style_cache.aget(urls_key)
+    if seen and time.time() - seen.get("checked_at", 0) < WRITING_STYLE_FRESH_FOR:
+        writing_style_summary = await writing_style_cache.aget("style:" + seen["fingerprint"])
+        if writing_style_summary is not None:
+            logger.info("[NODE 1.5] Writing style cache: status=hit | urls=%d | fingerprint=%s",
+                        len(urls), seen["fingerprint"][:12])
+            logger.info("[NODE 1.5 - EXTRACT_WRITING_STYLE] END")
+            logger.info("="*80)
+            return {"writing_style": writing_style_summary}
+
+    logger.info("[NODE 1.5] Loading content from %d reference URLs", len(urls))
+    reference_content = await aload_content_from_urls(urls, session_id=_session_id(config))
     
     if not reference_content:
         logger.warning("[NODE 1.5] Failed to load reference content")
@@ -94,20 +202,18 @@ def extract_writing_style_node(state):
         return {"writing_style": ""}
     
     logger.info("[NODE 1.5] Loaded %d chars of reference content", len(reference_content))
-    
-    prompt = ChatPromptTemplate.from_template(writing_style_prompt.template)
-    chain = prompt | llm
-    
-    prompt_vars = {"reference_content": reference_content}
-    
-    logger.info("[NODE 1.5] LLM Call - Extracting writing style")
-    out = chain.invoke(prompt_vars)
-    
-    logger.info("[NODE 1.5] LLM Response - Raw output:")
-    logger.info(out.content)
-    
-    parsed = _coerce_json(out.content)
-    writing_style_summary = parsed.get("summary", json.dumps(parsed, indent=2, ensure_ascii=False))
+
+    fingerprint = make_key(urls, reference_content)
+    writing_style_summary = await writing_style_cache.aget("style:" + fingerprint)
+    if writing_style_summary is not None:
+        status = "revalidated"
+    else:
+        status = "changed" if seen else "miss"
+        writing_style_summary = await _summarize_writing_style(reference_content)
+        await writing_style_cache.aset("style:" + fingerprint, writing_style_summary)
+    await writing_style_cache.aset(urls_key, {"fingerprint": fingerprint, "checked_at": time.time()})
+    logger.info("[NODE 1.5] Writing style cache: status=%s | urls=%d | fingerprint=%s",
+                status, len(urls), fingerprint[:12])
     
     logger.info("[NODE 1.5] Output - Writing style extracted: %s", writing_style_summary)
     logger.info("[NODE 1.5 - EXTRACT_WRITING_STYLE] END")
@@ -117,7 +223,8 @@ def extract_writing_style_node(state):
 
 
 @traceable(name="generate_outlines_node")
-def generate_outlines_node(state):
+@instrument_node("generate_outlines")
+async def generate_outlines_node(state, config: RunnableConfig = None):
     logger.info("="*80)
     logger.info("[NODE 2 - GENERATE_OUTLINES] START")
     
@@ -126,6 +233,7 @@ def generate_outlines_node(state):
         logger.info("[NODE 2] Regenerating with user feedback: %s", user_feedback)
     
     writing_style = getattr(state, 'writing_style', "") or ""
+    updates = {}
 
     if user_feedback and state.outlines_json:
         logger.info("[NODE 2] Mode: MODIFICATION (using only previous_outline + user_input)")
@@ -143,34 +251,31 @@ def generate_outlines_node(state):
         }
     else:
         logger.info("[NODE 2] Mode: INITIAL GENERATION (using articles + keywords)")
-        articles = state.articles or []
+        articles, refetched = await _load_sources(state.articles, _session_id(config))
+        if refetched:
+            updates["articles"] = await astash_articles(articles)
         logger.info("[NODE 2] Input - articles count=%d", len(articles))
         logger.info("[NODE 2] Input - keywords=%s", state.keywords)
         logger.info("[NODE 2] Input - num_outlines=%s", getattr(state, 'num_outlines', None))
-        articles_text = "\n\n".join(
-            [f"Title: {a.get('title','')}\nContent: {a.get('content','')}" 
-             for a in articles]
-        )
+        article_parts = [f"Title: {a.get('title','')}\nContent: {a.get('content','')}" for a in articles]
         
-        prompt_vars = {
+        prompt_vars = fit_prompt("generate_outlines", outlines_prompt.template, {
             "keywords": state.keywords, 
-            "articles": articles_text,
             "user_input": "None",
             "previous_outline": "",
             "num_outlines": state.num_outlines,
             "writing_style": writing_style
-        }
+        }, {"articles": article_parts})
     
     prompt = ChatPromptTemplate.from_template(outlines_prompt.template)
-    chain = prompt | llm
+    chain = prompt | get_llm()
     
-    logger.info("[NODE 2] LLM Call - Full Prompt:")
-    logger.info(outlines_prompt.template.format(**prompt_vars))
+    log_payload(logger, "[NODE 2] LLM Call - Full Prompt:", prompt_payload(outlines_prompt.template, prompt_vars))
     
-    out = chain.invoke(prompt_vars)
+    out = await chain.ainvoke(prompt_vars)
+    token_usage.record("generate_outlines", out)
     
-    logger.info("[NODE 2] LLM Response - Raw output:")
-    logger.info(out.content)
+    log_payload(logger, "[NODE 2] LLM Response - Raw output:", out.content)
     
     parsed = _coerce_json(out.content)
     
@@ -185,6 +290,7 @@ def generate_outlines_node(state):
     logger.info("="*80)
     
     return {
+        **updates,
         "outlines_json": parsed,
         "current_stage": "outlines",
         "follow_up_question": follow_up
@@ -192,37 +298,69 @@ def generate_outlines_node(state):
 
 
 
-@traceable(name="outline_router_node")
-def outline_router_node(state):
-    """Node 3: Router node after outline generation - uses LLM to decide APPROVE or EDIT"""
-    logger.info("="*80)
-    logger.info("[NODE 3 - OUTLINE_ROUTER] START")
-    
-    user_input = (state.user_feedback or "").strip()
-    logger.info("[NODE 3] Input - user_feedback='%s'", user_input)
-    logger.info("[NODE 3] Input - current_stage='%s'", state.current_stage)
-    
-    context = f"Generated outlines: {json.dumps(state.outlines_json, ensure_ascii=False)}"
-    
+def _outline_context(outlines_json: Optional[Dict[str, Any]]) -> str:
+    """Router context: outline title and section titles only."""
+    outlines_json = outlines_json or {}
+    sections = [s.get("section", "") for s in outlines_json.get("outlines", [])]
+    return f"Generated outline: {outlines_json.get('title', '')}\nSections: " + "; ".join(sections)
+
+
+def _draft_context(draft_article: Optional[Dict[str, Any]]) -> str:
+    """Router context: draft title and its section headings instead of the full article JSON."""
+    draft_article = draft_article or {}
+    headings = [line.lstrip("#").strip() for line in (draft_article.get("content") or "").splitlines()
+                if line.startswith("## ")]
+    return f"Draft article: {draft_article.get('title', '')}\nSections: " + "; ".join(headings)
+
+
+async def _route_feedback(router: str, tag: str, user_input: str, current_stage: str, context: str):
+    """
+    APPROVE/EDIT decision for a user reply. Clear replies are settled locally by
+    classify_feedback; only ambiguous ones go to the LLM router.
+    Returns (action, feedback) and records the decision source.
+    """
+    action = classify_feedback(user_input) if ROUTER_FAST_PATH else None
+    if action is not None:
+        feedback = user_input if action == "EDIT" else ""
+        logger.info("[%s] Fast-path decision (no LLM call) - action=%s", tag, action)
+        decision_counters.record(router, "rule", action)
+        return action, feedback
+
     prompt = ChatPromptTemplate.from_template(router_prompt.template)
-    chain = prompt | llm
+    chain = prompt | get_llm()
     prompt_vars = {
         "user_input": user_input,
-        "current_stage": state.current_stage,
+        "current_stage": current_stage,
         "context": context
     }
     
-    logger.info("[NODE 3] LLM Call - Full Prompt:")
-    logger.info(router_prompt.template.format(**prompt_vars))
+    log_payload(logger, f"[{tag}] LLM Call - Full Prompt:", prompt_payload(router_prompt.template, prompt_vars))
     
-    out = chain.invoke(prompt_vars)
+    out = await chain.ainvoke(prompt_vars)
+    token_usage.record(f"{router}_router", out)
     
-    logger.info("[NODE 3] LLM Response - Raw output:")
-    logger.info(out.content)
+    log_payload(logger, f"[{tag}] LLM Response - Raw output:", out.content)
     
     parsed = _coerce_json(out.content)
     action = parsed.get("action", "EDIT").upper()
     feedback = parsed.get("feedback", "")
+    decision_counters.record(router, "llm", action)
+    return action, feedback
+
+
+@traceable(name="outline_router_node")
+@instrument_node("outline_router")
+async def outline_router_node(state):
+    """Node 3: Router node after outline generation - decides APPROVE or EDIT (local fast path, LLM for ambiguous replies)"""
+    logger.info("="*80)
+    logger.info("[NODE 3 - OUTLINE_ROUTER] START")
+    
+    user_input = (state.user_feedback or "").strip()
+    logger.info("[NODE 3] Input - user_feedback='%s'", user_input)
+    logger.info("[NODE 3] Input - current_stage='%s'", state.current_stage)
+    
+    context = _outline_context(state.outlines_json)
+    action, feedback = await _route_feedback("outline", "NODE 3", user_input, state.current_stage, context)
     
     logger.info("[NODE 3] Output - action=%s", action)
     logger.info("[NODE 3] Output - feedback=%s", feedback)
@@ -240,8 +378,140 @@ def outline_router_node(state):
     return {"routing_decision": decision, "user_feedback": feedback if action == "EDIT" else ""}
 
 
+def _section_edges(content: str, size: int = 300) -> str:
+    body = content.split("\n", 1)[1] if content.startswith("#") and "\n" in content else content
+    body = " ".join(body.split())
+    if len(body) <= 2 * size:
+        return f"Text: {body}"
+    return f"Starts: {body[:size]}...\nEnds: ...{body[-size:]}"
+
+
+async def _write_sections_parallel(
+    prompt_vars: Dict[str, Any],
+    outline_sections: list,
+    web_parts: list,
+    passage_index: Optional[PassageIndex] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Write every outline section concurrently (bounded by WRITE_SECTIONS_CONCURRENCY)
+    with the shared title/tone/style context, then run a short assembly pass
+    for the introduction and transitions. Each section gets the top
+    RETRIEVAL_TOP_K passages from the session's passage index, falling back to
+    the full sources when retrieval finds nothing. Returns the same shape as the
+    single-shot draft (title, content, citations, follow_up_question), or None
+    if any section fails so the caller can fall back to single-shot.
+    """
+    count = len(outline_sections)
+    section_length = max(150, int(prompt_vars.get("length") or 1500) // count)
+    semaphore = asyncio.Semaphore(max(1, WRITE_SECTIONS_CONCURRENCY))
+    section_chain = ChatPromptTemplate.from_template(write_section_prompt.template) | get_llm()
+
+    def _section_vars(index: int, section: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tone": prompt_vars["tone"],
+            "section_length": section_length,
+            "target_audience": prompt_vars["target_audience"],
+            "keywords": prompt_vars["keywords"],
+            "title": prompt_vars["title"],
+            "outlines": prompt_vars["outlines"],
+            "section": section.get("section", "") or f"Section {index + 1}",
+            "section_description": section.get("description", ""),
+            "section_index": index + 1,
+            "section_count": count,
+            "writing_style": prompt_vars["writing_style"],
+        }
+
+    # Full sources are fitted to the per-section budget once and shared by sections without retrieval hits.
+    shared_web_content = None
+
+    def _section_web_content(index: int, section: Dict[str, Any]) -> str:
+        nonlocal shared_web_content
+        section_vars = _section_vars(index, section)
+        passages = []
+        if passage_index is not None and RETRIEVAL_TOP_K > 0:
+            query = " ".join([section_vars["section"], section_vars["section_description"], str(prompt_vars["keywords"] or "")])
+            passages = passage_index.search(query, RETRIEVAL_TOP_K)
+        if passages:
+            logger.info("[NODE 4] Section %d/%d retrieval | passages=%d | sources=%d | top_score=%.2f",
+                        index + 1, count, len(passages), len({p["url"] for p in passages}), passages[0]["score"])
+            return fit_prompt("write_section", write_section_prompt.template, section_vars,
+                              {"web_content": format_passages(passages)})["web_content"]
+        if shared_web_content is None:
+            shared_web_content = fit_prompt("write_section", write_section_prompt.template, section_vars,
+                                            {"web_content": web_parts})["web_content"]
+        return shared_web_content
+
+    async def _write_one(index: int, section: Dict[str, Any]):
+        section_vars = {**_section_vars(index, section), "web_content": _section_web_content(index, section)}
+        heading = section_vars["section"]
+        async with semaphore:
+            out = await section_chain.ainvoke(section_vars)
+        token_usage.record("write_section", out)
+        parsed = _coerce_json(out.content)
+        content = (parsed.get("content") or parsed.get("text") or "").strip()
+        if not content:
+            raise ValueError(f"empty content for section '{heading}'")
+        if not content.startswith("#"):
+            content = f"## {heading}\n\n{content}"
+        logger.info("[NODE 4] Section %d/%d written | heading='%s' | chars=%d", index + 1, count, heading, len(content))
+        return heading, content, parsed.get("citations") or []
+
+    results = await asyncio.gather(*(_write_one(i, s) for i, s in enumerate(outline_sections)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        for failure in failures:
+            logger.error("[NODE 4] Section writing failed: %s", failure)
+        return None
+
+    section_summaries = "\n\n".join(
+        f"Section {i + 1}: {heading}\n{_section_edges(content)}" for i, (heading, content, _) in enumerate(results)
+    )
+    assemble_vars = {
+        "title": prompt_vars["title"],
+        "tone": prompt_vars["tone"],
+        "target_audience": prompt_vars["target_audience"],
+        "keywords": prompt_vars["keywords"],
+        "section_summaries": section_summaries,
+        "writing_style": prompt_vars["writing_style"],
+    }
+    try:
+        assemble_chain = ChatPromptTemplate.from_template(assemble_article_prompt.template) | get_llm()
+        assembly_out = await assemble_chain.ainvoke(assemble_vars)
+        token_usage.record("assemble_article", assembly_out)
+        assembly = _coerce_json(assembly_out.content)
+    except Exception as e:
+        logger.warning("[NODE 4] Assembly pass failed, merging sections without transitions: %s", e)
+        assembly = {}
+
+    introduction = (assembly.get("introduction") or "").strip()
+    transitions = assembly.get("transitions") if isinstance(assembly.get("transitions"), list) else []
+    parts = [f"# {prompt_vars['title']}"]
+    if introduction:
+        parts.append(introduction)
+    for i, (_, content, _) in enumerate(results):
+        if i > 0 and i - 1 < len(transitions) and str(transitions[i - 1]).strip():
+            parts.append(str(transitions[i - 1]).strip())
+        parts.append(content)
+
+    citations, seen_urls = [], set()
+    for _, _, section_citations in results:
+        for citation in section_citations:
+            url = citation.get("url") if isinstance(citation, dict) else None
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                citations.append(citation)
+
+    return {
+        "title": prompt_vars["title"],
+        "content": "\n\n".join(parts),
+        "citations": citations,
+        "follow_up_question": assembly.get("follow_up_question", ""),
+    }
+
+
 @traceable(name="write_sections_node")
-def write_sections_node(state):
+@instrument_node("write_sections")
+async def write_sections_node(state, config: RunnableConfig = None):
     logger.info("="*80)
     logger.info("[NODE 4 - WRITE_SECTIONS] START")
     
@@ -260,10 +530,12 @@ def write_sections_node(state):
         f"- {s.get('section', '')}: {s.get('description', '')}" for s in outline_sections
     ]) if outline_sections else ""
     writing_style = getattr(state, 'writing_style', "") or ""
+    updates = {}
     
     if user_feedback and state.draft_article:
         logger.info("[NODE 4] Mode: MODIFICATION (using only previous_draft + user_input)")
         previous_draft = json.dumps(state.draft_article, indent=2, ensure_ascii=False)
+        web_parts = []
         prompt_vars = {
             "tone": tone,
             "length": length,
@@ -286,11 +558,11 @@ def write_sections_node(state):
         logger.info("[NODE 4] Input - outline_title='%s'", outline_title)
         logger.info("[NODE 4] Input - outline sections count=%d", len(outline_sections))
         
-        articles = state.articles or []
-        web_content = "\n\n".join(
-            [f"Source: {a.get('title', '')}\nURL: {a.get('url', '')}\nContent: {a.get('content', '')}" 
-             for a in articles]
-        )
+        articles, refetched = await _load_sources(state.articles, _session_id(config))
+        if refetched:
+            updates["articles"] = await astash_articles(articles)
+        web_parts = [f"Source: {a.get('title', '')}\nURL: {a.get('url', '')}\nContent: {a.get('content', '')}" 
+                     for a in articles]
         
         prompt_vars = {
             "tone": tone,
@@ -299,24 +571,43 @@ def write_sections_node(state):
             "keywords": keywords,
             "title": outline_title,
             "outlines": outlines_str,
-            "web_content": web_content,
+            "web_content": "",
             "user_input": "None",
             "previous_draft": "",
             "writing_style": writing_style
         }
     
-    prompt = ChatPromptTemplate.from_template(write_sections_prompt.template)
-    chain = prompt | llm
-    
-    logger.info("[NODE 4] LLM Call - Full Prompt:")
-    logger.info(write_sections_prompt.template.format(**prompt_vars))
-    
-    out = chain.invoke(prompt_vars)
-    
-    logger.info("[NODE 4] LLM Response - Raw output:")
-    logger.info(out.content)
-    
-    parsed = _coerce_json(out.content)
+    parsed = None
+    use_parallel = (
+        WRITE_SECTIONS_MODE == "parallel"
+        and not (user_feedback and state.draft_article)
+        and len(outline_sections) >= WRITE_SECTIONS_PARALLEL_MIN_SECTIONS
+    )
+    if use_parallel:
+        logger.info("[NODE 4] Writing %d sections in parallel (concurrency=%d)",
+                    len(outline_sections), WRITE_SECTIONS_CONCURRENCY)
+        passage_index = None
+        if RETRIEVAL_TOP_K > 0:
+            passage_index = await asyncio.to_thread(PassageIndex, articles)
+        parsed = await _write_sections_parallel(prompt_vars, outline_sections, web_parts, passage_index)
+        if parsed is None:
+            logger.warning("[NODE 4] Section-parallel writing failed, falling back to single-shot")
+
+    if parsed is None:
+        if web_parts:
+            prompt_vars = fit_prompt("write_sections", write_sections_prompt.template, prompt_vars,
+                                     {"web_content": web_parts})
+        prompt = ChatPromptTemplate.from_template(write_sections_prompt.template)
+        chain = prompt | get_llm()
+        
+        log_payload(logger, "[NODE 4] LLM Call - Full Prompt:", prompt_payload(write_sections_prompt.template, prompt_vars))
+        
+        out = await chain.ainvoke(prompt_vars)
+        token_usage.record("write_sections", out)
+        
+        log_payload(logger, "[NODE 4] LLM Response - Raw output:", out.content)
+        
+        parsed = _coerce_json(out.content)
     
     logger.info("[NODE 4] Output - Parsed JSON keys: %s", list(parsed.keys()))
     
@@ -329,6 +620,7 @@ def write_sections_node(state):
     logger.info("="*80)
     
     return {
+        **updates,
         "draft_article": parsed, 
         "current_stage": "draft", 
         "user_feedback": "",
@@ -336,8 +628,9 @@ def write_sections_node(state):
     }
 
 @traceable(name="article_router_node")
-def article_router_node(state):
-    """Node 5: Router node after article generation - uses LLM to decide APPROVE or EDIT"""
+@instrument_node("article_router")
+async def article_router_node(state):
+    """Node 5: Router node after article generation - decides APPROVE or EDIT (local fast path, LLM for ambiguous replies)"""
     logger.info("="*80)
     logger.info("[NODE 5 - ARTICLE_ROUTER] START")
     
@@ -345,28 +638,9 @@ def article_router_node(state):
     logger.info("[NODE 5] Input - user_feedback='%s'", user_input)
     logger.info("[NODE 5] Input - current_stage='%s'", state.current_stage)
     
-    context = json.dumps(state.draft_article or {}, ensure_ascii=False)
+    context = _draft_context(state.draft_article)
     logger.info("[NODE 5] Input - context='%s'", context)
-    
-    prompt = ChatPromptTemplate.from_template(router_prompt.template)
-    chain = prompt | llm
-    prompt_vars = {
-        "user_input": user_input,
-        "current_stage": state.current_stage,
-        "context": context
-    }
-    
-    logger.info("[NODE 5] LLM Call - Full Prompt:")
-    logger.info(router_prompt.template.format(**prompt_vars))
-    
-    out = chain.invoke(prompt_vars)
-    
-    logger.info("[NODE 5] LLM Response - Raw output:")
-    logger.info(out.content)
-    
-    parsed = _coerce_json(out.content)
-    action = parsed.get("action", "EDIT").upper()
-    feedback = parsed.get("feedback", "")
+    action, feedback = await _route_feedback("article", "NODE 5", user_input, state.current_stage, context)
     
     logger.info("[NODE 5] Output - action=%s", action)
     logger.info("[NODE 5] Output - feedback=%s", feedback)
@@ -385,43 +659,61 @@ def article_router_node(state):
 
 
 @traceable(name="generate_images_node")
-def generate_images_node(state):
-    """Node 6: Generate images for the blog article based on the title"""
+@instrument_node("generate_images")
+async def generate_images_node(state):
+    """
+    Node 6: Generate images for the blog article based on the title.
+
+    Runs twice per approval: concurrently with write_sections (using the outline
+    title) and again after it. The second run reuses the images when the draft
+    title is unchanged and their blobs still exist, so body-only edits never
+    regenerate the image.
+    """
     
     logger.info("="*80)
     logger.info("[NODE 6 - GENERATE_IMAGES] START")
     
-    draft_article = state.draft_article
-    title = draft_article.get("title")
+    draft_article = state.draft_article or {}
+    title = draft_article.get("title") or (state.outlines_json or {}).get("title", "")
     tone = state.tone
     target_audience = state.target_audience
     
     logger.info("[NODE 6] Input - title='%s', tone='%s', target_audience='%s'", title, tone, target_audience)
+    
+    if state.image_hashes and state.image_title == title:
+        if await ablobs_present(state.image_hashes):
+            logger.info("[NODE 6] Title unchanged, reusing %d existing images", len(state.image_hashes))
+            logger.info("[NODE 6 - GENERATE_IMAGES] END")
+            logger.info("="*80)
+            return {}
+        logger.warning("[NODE 6] Stored images were swept from the blob store, regenerating")
+    
     logger.info("[NODE 6] Generating images directly with title, tone, and target_audience")
     
     try:
-        base64_images, formatted_prompt = generate_images(
+        image_hashes, formatted_prompt = await agenerate_images(
             title=title,
             tone=tone,
             target_audience=target_audience,
             number_of_images=1
         )
-        logger.info("[NODE 6] Successfully received %d base64 images from generate_images()", len(base64_images))
+        logger.info("[NODE 6] Successfully stored %d images from generate_images()", len(image_hashes))
         
         logger.info("[NODE 6 - GENERATE_IMAGES] END")
         logger.info("="*80)
         
         return {
-            "generated_images": base64_images,
+            "image_hashes": image_hashes,
             "image_prompt": formatted_prompt,
-            "image_count": len(base64_images)
+            "image_count": len(image_hashes),
+            "image_title": title
         }
     except Exception as e:
         logger.error("[NODE 6] Error generating images: %s", str(e))
         logger.info("[NODE 6 - GENERATE_IMAGES] END")
         logger.info("="*80)
         return {
-            "generated_images": [],
+            "image_hashes": [],
             "image_prompt": "",
             "image_count": 0
         }
\ No newline at end of file
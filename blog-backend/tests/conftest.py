@@ -0,0 +1,39 @@
+import os
+import operator
+import tempfile
+from typing import Annotated, List, TypedDict
+
+import pytest
+
+# Applied before any app module is imported: memory-only caches and
+# checkpointer, blobs in a scratch directory, no LLM cache or tracing.
+for key, value in {
+    "LLM_CACHE_MODE": "off",
+    "SEARCH_CACHE_PATH": "",
+    "PAGE_CACHE_PATH": "",
+    "WRITING_STYLE_CACHE_PATH": "",
+    "CHECKPOINTER": "memory",
+    "BLOB_STORE_PATH": os.path.join(tempfile.mkdtemp(prefix="blog-tests-"), "blobs"),
+    "TRACE_SAMPLE_RATE": "0",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+class _CounterState(TypedDict):
+    turn: int
+    notes: Annotated[List[str], operator.add]
+
+
+@pytest.fixture
+def counter_graph():
+    """Builds a one-node graph on a checkpointer; every invoke adds a turn and a 100-byte note."""
+    from langgraph.graph import END, START, StateGraph
+
+    def build(checkpointer):
+        builder = StateGraph(_CounterState)
+        builder.add_node("step", lambda state: {"turn": state.get("turn", 0) + 1, "notes": ["x" * 100]})
+        builder.add_edge(START, "step")
+        builder.add_edge("step", END)
+        return builder.compile(checkpointer=checkpointer)
+
+    return build
@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import pytest
+
+from utils import blobs
+from utils.blobs import BlobNotFound, BlobStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blobs, "blob_store", store)
+    return store
+
+
+def test_put_is_content_addressed_and_deduplicated(store):
+    first = store.put(b"\x89PNG data", "image/png")
+    assert store.put(b"\x89PNG data", "image/png") == first
+    assert store.get(first) == (b"\x89PNG data", "image/png")
+    assert (store.writes, store.dedup_hits) == (1, 1)
+    assert store.get("not-a-hash") is None
+
+
+def test_missing_text_blob_raises(store):
+    blob_hash = store.put_text("content")
+    os.remove(store._path(blob_hash))
+    with pytest.raises(BlobNotFound):
+        store.get_text(blob_hash)
+
+
+def test_swept_article_content_is_marked_missing(store):
+    articles = blobs.stash_articles([{"url": "https://a", "content": "kept"}, {"url": "https://b", "content": "swept"}])
+    assert all("content" not in a for a in articles)
+    os.remove(store._path(articles[1]["content_hash"]))
+    loaded = blobs.load_articles(articles)
+    assert loaded[0]["content"] == "kept" and "content_missing" not in loaded[0]
+    assert loaded[1]["content_missing"] is True and "content" not in loaded[1]
+
+
+def test_blobs_present_touches_existing_blobs_and_reports_missing_ones(store):
+    kept, swept = store.put(b"a"), store.put(b"b")
+    os.utime(store._path(kept), (0, 0))
+    os.remove(store._path(swept))
+    assert asyncio.run(blobs.ablobs_present([kept])) is True
+    assert os.path.getmtime(store._path(kept)) > 0
+    assert asyncio.run(blobs.ablobs_present([kept, swept])) is False
+
+
+def test_sweep_removes_blobs_unused_for_ttl(store):
+    store.ttl, store.sweep_interval, store._last_sweep = 60, 0, 0
+    old = store.put(b"old")
+    os.utime(store._path(old), (0, 0))
+    store.put(b"new")
+    assert store.get(old) is None
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+from utils import cache as cache_module
+from utils.cache import TTLCache, make_key
+
+
+def test_make_key_is_stable_and_order_independent_for_dicts():
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+    assert make_key("a", 1) != make_key("a", 2)
+
+
+def test_memory_tier_evicts_least_recently_used_entry():
+    cache = TTLCache("test-lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = TTLCache("test-bytes", max_entries=100, max_bytes=20)  # sizes are JSON lengths: 12 each
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 10
+    cache.set("huge", "z" * 100)
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] == 12
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = TTLCache("test-ttl", ttl=10)
+    cache.set("a", 1)
+    cache.set("forever", 2, ttl=None)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a", "expired") == "expired"
+    assert cache.get("forever") == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TTLCache("test-disk", max_entries=1, path=path)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["disk_hits"] == 1
+    other_worker = TTLCache("test-disk", path=path)
+    assert other_worker.get("b") == {"v": 2}
+
+
+def test_disk_tier_is_bounded_and_drops_expired_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = TTLCache("test-disk-ttl", ttl=10, max_entries=1, path=str(tmp_path / "cache.sqlite"), disk_max_bytes=30)
+    cache.set("a", "x" * 10)
+    now[0] += 1
+    cache.set("b", "y" * 10)
+    now[0] += 1
+    cache.set("c", "z" * 10)  # over disk_max_bytes: "a" is the least recently used
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 10
+    now[0] += 20
+    assert cache.get("b") is None
+
+
+def test_async_accessors_match_sync_ones(tmp_path):
+    async def roundtrip(cache):
+        await cache.aset("k", [1, 2])
+        return await cache.aget("k"), await cache.aget("missing", "default")
+
+    assert asyncio.run(roundtrip(TTLCache("test-async-memory"))) == ([1, 2], "default")
+    disk = TTLCache("test-async-disk", path=os.path.join(tmp_path, "cache.sqlite"))
+    assert asyncio.run(roundtrip(disk)) == ([1, 2], "default")
@@ -0,0 +1,68 @@
+from utils import checkpoint as checkpoint_module
+from utils.checkpoint import BoundedMemorySaver
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _run(graph, thread_id, turns):
+    for _ in range(turns):
+        graph.invoke({"notes": []}, _config(thread_id))
+
+
+def test_compaction_keeps_latest_checkpoints_and_their_blobs(counter_graph):
+    saver = BoundedMemorySaver(max_checkpoints=2)
+    graph = counter_graph(saver)
+    _run(graph, "s", 5)
+
+    assert len(saver.storage["s"][""]) == 2
+    assert saver.stats()["compacted_checkpoints"] > 0
+    state = graph.get_state(_config("s")).values
+    assert state["turn"] == 5 and len(state["notes"]) == 5
+
+    kept = saver.storage["s"][""]
+    live = set()
+    for checkpoint, _, _ in kept.values():
+        versions = saver.serde.loads_typed(checkpoint)["channel_versions"]
+        live.update(("s", "", channel, version) for channel, version in versions.items())
+    assert set(saver.blobs) <= live
+    assert all(key[2] in kept for key in saver.writes)
+
+
+def test_compaction_is_off_without_max_checkpoints(counter_graph):
+    saver = BoundedMemorySaver()
+    _run(counter_graph(saver), "s", 3)
+    assert len(saver.storage["s"][""]) > 3
+    assert saver.stats()["compacted_checkpoints"] == 0
+
+
+def test_least_recently_used_session_is_evicted_over_budget(counter_graph):
+    saver = BoundedMemorySaver(max_checkpoints=1)
+    graph = counter_graph(saver)
+    _run(graph, "a", 1)
+    _run(graph, "b", 1)
+    saver.max_bytes = int(saver.stats()["bytes"] * 1.25)  # room for two sessions, not three
+
+    graph.get_state(_config("a"))  # "b" is now the least recently used
+    _run(graph, "c", 1)
+
+    assert set(saver.storage) == {"a", "c"}
+    assert saver.stats()["evictions"] == 1
+    assert saver.stats()["bytes"] <= saver.max_bytes
+    assert graph.get_state(_config("b")).values == {}
+
+
+def test_idle_sessions_expire(counter_graph, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpoint_module.time, "time", lambda: now[0])
+    saver = BoundedMemorySaver(ttl=60)
+    graph = counter_graph(saver)
+    _run(graph, "idle", 1)
+    now[0] += 30
+    _run(graph, "active", 1)
+    now[0] += 31
+
+    assert graph.get_state(_config("idle")).values == {}
+    assert graph.get_state(_config("active")).values["turn"] == 1
+    assert saver.stats()["expirations"] == 1
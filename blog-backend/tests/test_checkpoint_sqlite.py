@@ -0,0 +1,30 @@
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from utils.checkpoint_sqlite import CompressedSerializer, SharedSqliteSaver
+
+
+def test_small_payloads_are_stored_uncompressed():
+    serde = CompressedSerializer(min_size=1024)
+    type_, data = serde.dumps_typed({"a": 1})
+    assert (type_, data) == JsonPlusSerializer().dumps_typed({"a": 1})
+    assert serde.loads_typed((type_, data)) == {"a": 1}
+
+
+def test_large_payloads_round_trip_compressed():
+    serde = CompressedSerializer(min_size=1024)
+    value = {"articles": [{"title": f"t{i}", "content": "lorem ipsum " * 200} for i in range(5)], "bytes": b"\x00\x01" * 600}
+    type_, data = serde.dumps_typed(value)
+    plain_type, plain = JsonPlusSerializer().dumps_typed(value)
+    assert type_ != plain_type and len(data) < len(plain)
+    assert serde.loads_typed((type_, data)) == value
+
+
+def test_saver_round_trips_checkpoints_through_sqlite(tmp_path, counter_graph):
+    saver = SharedSqliteSaver(str(tmp_path / "checkpoints.sqlite"), max_checkpoints=2)
+    graph = counter_graph(saver)
+    config = {"configurable": {"thread_id": "s"}}
+    for _ in range(4):
+        graph.invoke({"notes": []}, config)
+    state = graph.get_state(config).values
+    assert state["turn"] == 4 and state["notes"] == ["x" * 100] * 4
+    assert len(list(saver.list(config))) == 2
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.intent import MAX_RULE_WORDS, DecisionCounters, classify_feedback
+
+
+@pytest.mark.parametrize("text", [
+    "looks good",
+    "LGTM!",
+    "Yes, please go ahead.",
+    "great job 🎉",
+    "ok thanks",
+    "That’s fine, proceed",
+    "no changes needed",
+    "don't change anything",
+    "write the article",
+])
+def test_clear_approvals(text):
+    assert classify_feedback(text) == "APPROVE"
+
+
+@pytest.mark.parametrize("text", [
+    "add a section on pricing",
+    "make it shorter",
+    "correct the intro",
+    "rewrite the conclusion with more data",
+])
+def test_clear_edit_requests(text):
+    assert classify_feedback(text) == "EDIT"
+
+
+@pytest.mark.parametrize("text", [
+    "looks good but make it shorter",
+    "great, however add a pricing section",
+    "no, but add a section on pricing",
+    "not bad, though expand the second section",
+])
+def test_contrast_after_approval_or_negation_is_an_edit(text):
+    assert classify_feedback(text) == "EDIT"
+
+
+@pytest.mark.parametrize("text", [
+    "no",
+    "not good",
+    "don't add anything about pricing",
+    "never remove the intro",
+    "nope",
+])
+def test_negations_are_left_to_the_llm(text):
+    assert classify_feedback(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "looks good?",
+    "can you add a pricing section?",
+    "hmm, I'm not sure about the tone",
+    " ".join(["add"] + ["word"] * MAX_RULE_WORDS),
+])
+def test_ambiguous_replies_are_left_to_the_llm(text):
+    assert classify_feedback(text) is None
+
+
+def test_decision_counters_report_rule_ratio_per_router():
+    counters = DecisionCounters()
+    counters.record("outline", "rule", "APPROVE")
+    counters.record("outline", "rule", "EDIT")
+    counters.record("outline", "llm", "EDIT")
+    stats = counters.stats()["outline"]
+    assert (stats["rule_approve"], stats["rule_edit"], stats["llm_edit"], stats["total"]) == (1, 1, 1, 3)
+    assert stats["rule_ratio"] == round(2 / 3, 4)
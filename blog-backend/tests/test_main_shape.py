@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from src.main import GenerateResponse, _etag_matches, _shape_body, _shape_response, _state_etag, _validate_fields
+
+
+def _response(**values):
+    return GenerateResponse(status="success", session_id="s", current_stage="outlines", **values)
+
+
+def _body(rendered):
+    return json.loads(rendered.body)
+
+
+def test_full_response_has_every_field_an_etag_and_the_state_version():
+    rendered = _shape_response(_response(keywords="a, b"), "v1")
+    assert set(_body(rendered)) == set(GenerateResponse.model_fields)
+    assert rendered.headers["X-State-Version"] == "v1"
+    assert rendered.headers["ETag"] == _state_etag("v1", None)
+
+
+def test_projection_keeps_requested_fields_and_the_always_included_ones():
+    rendered = _shape_response(_response(keywords="a", outlines_json={"title": "T"}), "v1", ["outlines_json"])
+    assert _body(rendered) == {"status": "success", "session_id": "s", "current_stage": "outlines",
+                               "outlines_json": {"title": "T"}}
+
+
+def test_etag_depends_on_version_and_projection_but_not_field_order():
+    assert _state_etag("v1", ["keywords", "outlines_json"]) == _state_etag("v1", ["outlines_json", "keywords"])
+    assert _state_etag("v1", ["keywords"]) != _state_etag("v1", None)
+    assert _state_etag("v1", None) != _state_etag("v2", None)
+    assert _state_etag("v1", None).startswith('"v1:')
+
+
+def test_delta_returns_only_changed_fields_and_no_etag():
+    before = _response(keywords="a", outlines_json={"title": "T"})
+    after = _response(keywords="a", outlines_json={"title": "T2"}, follow_up_question="ok?")
+    rendered = _shape_response(after, "v2", previous=before)
+    assert _body(rendered) == {"status": "success", "session_id": "s", "current_stage": "outlines",
+                               "outlines_json": {"title": "T2"}, "follow_up_question": "ok?"}
+    assert "ETag" not in rendered.headers
+    assert rendered.headers["X-State-Version"] == "v2"
+
+
+def test_delta_combines_with_projection():
+    before = _response(keywords="a", outlines_json={"title": "T"})
+    after = _response(keywords="b", outlines_json={"title": "T2"})
+    assert set(_shape_body(after, ["keywords"], before)) == {"status", "session_id", "current_stage", "keywords"}
+    assert set(_shape_body(before, ["keywords"], before)) == {"status", "session_id", "current_stage"}
+
+
+def test_unknown_fields_are_rejected():
+    _validate_fields(["keywords", "draft_article"])
+    with pytest.raises(HTTPException) as error:
+        _validate_fields(["keywords", "nope"])
+    assert error.value.status_code == 400
+
+
+def test_session_endpoint_answers_304_for_a_matching_etag():
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    client = TestClient(app)
+    first = client.get("/session/test-etag", params={"fields": "outlines_json"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    cached = client.get("/session/test-etag", params={"fields": "outlines_json"}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    other_projection = client.get("/session/test-etag", headers={"If-None-Match": etag})
+    assert other_projection.status_code == 200
+
+
+def test_if_none_match_accepts_lists_weak_validators_and_a_wildcard():
+    etag = '"3:abcd1234"'
+    assert _etag_matches(etag, etag)
+    assert _etag_matches('"1:ffff0000", "3:abcd1234"', etag)
+    assert _etag_matches('W/"3:abcd1234"', etag)
+    assert _etag_matches('"3:abcd1234"', 'W/"3:abcd1234"')
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"1:ffff0000", W/"2:abcd1234"', etag)
+    assert not _etag_matches(None, etag)
+
+
+def test_compressed_bodies_get_a_weak_etag_that_still_revalidates():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from utils.compression import CompressionMiddleware
+
+    inner = FastAPI()
+
+    @inner.get("/big")
+    def big():
+        return _shape_response(_response(keywords="a" * 4096), "3")
+
+    client = TestClient(CompressionMiddleware(inner, min_size=1024))
+    compressed = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == "W/" + _state_etag("3", None)
+    assert _etag_matches(compressed.headers["ETag"], _state_etag("3", None))
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert identity.headers["ETag"] == _state_etag("3", None)
@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils import tools
+
+
+def _result(n):
+    return {"title": f"title {n}", "url": f"https://example.com/{n}", "content": f"content {n}"}
+
+
+def test_grouped_results_maps_one_group_per_query():
+    search = SimpleNamespace(results=[[_result(1), _result(2)], [_result(3)]])
+    grouped = tools._grouped_results(search, ["a", "b"], max_results=1)
+    assert [[r["url"] for r in group] for group in grouped] == [["https://example.com/1"], ["https://example.com/3"]]
+
+
+def test_grouped_results_single_query_takes_flat_list():
+    search = SimpleNamespace(results=[_result(1), _result(2)])
+    grouped = tools._grouped_results(search, ["a"], max_results=2)
+    assert [r["url"] for r in grouped[0]] == ["https://example.com/1", "https://example.com/2"]
+
+
+def test_grouped_results_unmappable_response_returns_none_per_query():
+    flat = SimpleNamespace(results=[_result(1), _result(2), _result(3)])
+    assert tools._grouped_results(flat, ["a", "b"], max_results=1) == [None, None]
+    wrong_count = SimpleNamespace(results=[[_result(1)]])
+    assert tools._grouped_results(wrong_count, ["a", "b"], max_results=1) == [None, None]
+
+
+def test_batched_search_falls_back_to_single_searches_for_unmapped_queries(monkeypatch):
+    singles = []
+
+    async def batch(queries, max_results=1, timeout=None):
+        return [[_result(0)], None, None][:len(queries)]
+
+    async def single(query, max_results=1, timeout=None, use_cache=True):
+        singles.append(query)
+        return [_result(query)]
+
+    monkeypatch.setattr(tools, "aperplexity_search_batch", batch)
+    monkeypatch.setattr(tools, "aperplexity_search", single)
+    results = asyncio.run(tools.asearch_articles_batched(["q0", "q1", "q2"], batch_size=3, use_cache=False))
+    assert singles == ["q1", "q2"]
+    assert [r["url"] for r in results] == ["https://example.com/0", "https://example.com/q1", "https://example.com/q2"]
+
+
+def test_batched_search_fallback_only_gets_the_time_left(monkeypatch):
+    timeouts = []
+
+    async def batch(queries, max_results=1, timeout=None):
+        await asyncio.sleep(0.2)
+        return [None] * len(queries)
+
+    async def single(query, max_results=1, timeout=None, use_cache=True):
+        timeouts.append(timeout)
+        await asyncio.sleep(1)
+        return [_result(query)]
+
+    monkeypatch.setattr(tools, "aperplexity_search_batch", batch)
+    monkeypatch.setattr(tools, "aperplexity_search", single)
+    start = tools.perf_counter()
+    results = asyncio.run(tools.asearch_articles_batched(["q0", "q1"], batch_size=2, timeout=0.4, use_cache=False))
+    assert results == []
+    assert len(timeouts) == 2 and all(0 < t <= 0.25 for t in timeouts)
+    assert tools.perf_counter() - start < 0.6
+
+
+def test_batched_search_skips_the_fallback_after_the_deadline(monkeypatch):
+    singles = []
+
+    async def batch(queries, max_results=1, timeout=None):
+        await asyncio.sleep(1)
+
+    async def single(query, max_results=1, timeout=None, use_cache=True):
+        singles.append(query)
+        return [_result(query)]
+
+    monkeypatch.setattr(tools, "aperplexity_search_batch", batch)
+    monkeypatch.setattr(tools, "aperplexity_search", single)
+    start = tools.perf_counter()
+    assert asyncio.run(tools.asearch_articles_batched(["q0", "q1"], batch_size=2, timeout=0.2, use_cache=False)) == []
+    assert singles == []
+    assert tools.perf_counter() - start < 0.4
@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+import pytest
+
+from utils.tracing import Span, Trace, _critical_segments, build_report
+
+
+def _tree(*specs):
+    """specs: (span_id, parent_id, name, kind, start, end); returns (root, children by parent id)."""
+    spans = []
+    for span_id, parent_id, name, kind, start, end in specs:
+        s = Span(span_id, parent_id, name, kind, start)
+        s.end = end
+        spans.append(s)
+    children = defaultdict(list)
+    for s in spans[1:]:
+        children[s.parent_id].append(s)
+    return spans, children
+
+
+def _path(spans, children):
+    return [(s.name, start, end) for s, start, end in sorted(_critical_segments(spans[0], children), key=lambda seg: seg[1])]
+
+
+def test_sequential_children_and_gaps_cover_the_whole_span():
+    spans, children = _tree(
+        (1, None, "root", "endpoint", 0.0, 10.0),
+        (2, 1, "search", "call", 1.0, 4.0),
+        (3, 1, "llm", "call", 5.0, 9.0),
+    )
+    assert _path(spans, children) == [
+        ("root", 0.0, 1.0), ("search", 1.0, 4.0), ("root", 4.0, 5.0), ("llm", 5.0, 9.0), ("root", 9.0, 10.0),
+    ]
+
+
+def test_parallel_children_keep_only_the_one_that_finished_last():
+    spans, children = _tree(
+        (1, None, "root", "endpoint", 0.0, 10.0),
+        (2, 1, "slow", "call", 1.0, 8.0),
+        (3, 1, "fast", "call", 2.0, 5.0),
+    )
+    assert _path(spans, children) == [("root", 0.0, 1.0), ("slow", 1.0, 8.0), ("root", 8.0, 10.0)]
+
+
+def test_grandchildren_on_the_path_replace_their_parent_time():
+    spans, children = _tree(
+        (1, None, "root", "endpoint", 0.0, 10.0),
+        (2, 1, "node", "node", 0.0, 10.0),
+        (3, 2, "llm", "call", 2.0, 6.0),
+        (4, 2, "parse", "internal", 6.0, 7.0),
+    )
+    assert _path(spans, children) == [
+        ("node", 0.0, 2.0), ("llm", 2.0, 6.0), ("parse", 6.0, 7.0), ("node", 7.0, 10.0),
+    ]
+
+
+def test_children_reaching_outside_their_parent_are_clipped():
+    spans, children = _tree(
+        (1, None, "root", "endpoint", 0.0, 10.0),
+        (2, 1, "node", "node", 6.0, 7.0),
+        (3, 1, "background", "call", 8.0, 12.0),
+        (4, 2, "early", "call", 5.0, 6.5),
+    )
+    assert _path(spans, children) == [
+        ("root", 0.0, 6.0), ("early", 6.0, 6.5), ("node", 6.5, 7.0), ("root", 7.0, 8.0), ("background", 8.0, 10.0),
+    ]
+
+
+def test_report_splits_the_critical_path_into_waiting_and_computing():
+    trace = Trace("/generate", "s")
+    spans, _ = _tree(
+        (1, None, "/generate", "endpoint", 0.0, 1.0),
+        (2, 1, "deepseek.chat", "call", 0.1, 0.7),
+        (3, 1, "parse", "internal", 0.75, 0.8),
+    )
+    trace.spans = spans
+    report = build_report(trace)
+    assert report["duration_ms"] == 1000.0
+    assert report["critical_path_split_ms"]["waiting"] == pytest.approx(600.0)
+    assert report["critical_path_split_ms"]["computing"] == pytest.approx(400.0)
+    assert sum(p["duration_ms"] for p in report["critical_path"]) == pytest.approx(1000.0)
+    assert [p["name"] for p in report["critical_path"]] == [
+        "/generate", "deepseek.chat", "/generate", "parse", "/generate",
+    ]
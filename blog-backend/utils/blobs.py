@@ -0,0 +1,186 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+BLOB_STORE_PATH = os.getenv(
+    "BLOB_STORE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "blobs")
+)
+BLOB_TTL = float(os.getenv("BLOB_TTL", str(7 * 24 * 3600)))
+BLOB_SWEEP_INTERVAL = float(os.getenv("BLOB_SWEEP_INTERVAL", "3600"))
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobNotFound(LookupError):
+    """No blob under this hash: never stored here, or swept after BLOB_TTL."""
+
+
+def is_blob_hash(value: Any) -> bool:
+    return isinstance(value, str) and bool(_HASH_RE.match(value))
+
+
+class BlobStore:
+    """
+    Content-addressed store for large values kept out of the graph state.
+
+    Blobs are immutable files named by the sha256 of their bytes, so a value
+    is written once however many checkpoints, sessions or responses refer to
+    it, and every worker on the host shares the same directory. The content
+    type is stored as the first line of the file. Blobs not written or read
+    for `ttl` seconds are swept.
+    """
+
+    def __init__(self, root: str, ttl: Optional[float] = None, sweep_interval: float = 3600.0):
+        self.root = root
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self.writes = 0
+        self.dedup_hits = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, blob_hash: str) -> str:
+        return os.path.join(self.root, blob_hash[:2], blob_hash)
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store data and return its hash. Storing the same bytes again is a no-op."""
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(blob_hash)
+        if os.path.exists(path):
+            os.utime(path)
+            self.dedup_hits += 1
+            return blob_hash
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content_type.encode("utf-8") + b"\n")
+            f.write(data)
+        os.replace(tmp, path)
+        self.writes += 1
+        self._maybe_sweep()
+        return blob_hash
+
+    def get(self, blob_hash: str) -> Optional[Tuple[bytes, str]]:
+        """Returns (data, content_type), or None for an unknown or malformed hash."""
+        if not is_blob_hash(blob_hash):
+            return None
+        path = self._path(blob_hash)
+        try:
+            with open(path, "rb") as f:
+                content_type = f.readline().rstrip(b"\n").decode("utf-8")
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data, content_type
+
+    def touch(self, blob_hash: str) -> bool:
+        """Reset the blob's sweep clock, as a read would. False when the blob is gone."""
+        if not is_blob_hash(blob_hash):
+            return False
+        try:
+            os.utime(self._path(blob_hash))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode("utf-8"), "text/plain; charset=utf-8")
+
+    def get_text(self, blob_hash: str) -> str:
+        """Text stored with put_text. Raises BlobNotFound when the blob is gone."""
+        blob = self.get(blob_hash)
+        if blob is None:
+            raise BlobNotFound(blob_hash)
+        return blob[0].decode("utf-8")
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        if self.ttl is None or now - self._last_sweep < self.sweep_interval:
+            return
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if now - os.path.getmtime(path) > self.ttl:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        if removed:
+            logger.info("[BLOBS] Swept %d expired blobs", removed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "writes": self.writes, "dedup_hits": self.dedup_hits}
+
+
+blob_store = BlobStore(BLOB_STORE_PATH, ttl=BLOB_TTL or None, sweep_interval=BLOB_SWEEP_INTERVAL)
+
+
+def blob_url(blob_hash: str) -> str:
+    return f"/blobs/{blob_hash}"
+
+
+async def ablobs_present(blob_hashes: List[str]) -> bool:
+    """True when every blob still exists (each one's sweep clock is reset); checked in a worker thread."""
+    return await asyncio.to_thread(lambda: all([blob_store.touch(h) for h in blob_hashes]))
+
+
+def stash_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Move each article's content into the blob store, leaving content_hash in its place."""
+    stashed = []
+    for article in articles:
+        article = dict(article)
+        content = article.pop("content", None)
+        if content:
+            article["content_hash"] = blob_store.put_text(content)
+        stashed.append(article)
+    return stashed
+
+
+def load_articles(articles: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Inverse of stash_articles: articles with their content read back from the
+    blob store. An article whose blob is gone gets no content and
+    content_missing=True, so the caller can fetch it again from its url.
+    """
+    loaded = []
+    for article in articles or []:
+        article = dict(article)
+        if "content" not in article and article.get("content_hash"):
+            try:
+                article["content"] = blob_store.get_text(article["content_hash"])
+            except BlobNotFound:
+                logger.warning("[BLOBS] Missing content blob %s for %s", article["content_hash"], article.get("url"))
+                article["content_missing"] = True
+        loaded.append(article)
+    return loaded
+
+
+async def astash_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """stash_articles for async callers: blob files are written in a worker thread."""
+    return await asyncio.to_thread(stash_articles, articles)
+
+
+async def aload_articles(articles: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """load_articles for async callers: blob files are read in a worker thread."""
+    return await asyncio.to_thread(load_articles, articles)
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_caches: Dict[str, "TTLCache"] = {}
+
+
+def make_key(*parts: Any) -> str:
+    """Stable sha256 key for any JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Two-tier key/value cache for JSON-serializable values.
+
+    - Memory tier: LRU bounded by max_entries and (optionally) max_bytes.
+    - Disk tier (optional, when path is set): SQLite file in WAL mode, shared
+      by every worker on the host and bounded by disk_max_bytes. Entries
+      evicted from memory are still served from disk until they expire.
+
+    Every entry expires ttl seconds after it was written (ttl=None: never).
+    Hit/miss/eviction counters are exposed through stats().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        path: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[Optional[float], int, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = self._open_db(path)
+        _caches[name] = self
+
+    def _open_db(self, path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, expires_at REAL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+        logger.info("[CACHE:%s] Disk tier at %s", self.name, path)
+        return db
+
+    @property
+    def has_disk(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            value = self._disk_get(key, now)
+            if value is not _MISSING:
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = _MISSING) -> None:
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        raw = json.dumps(value, ensure_ascii=False)
+        size = len(raw)
+        with self._lock:
+            self._memory_put(key, expires_at, size, value)
+            self._disk_put(key, raw, size, expires_at)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """get() for async callers: the disk tier is read in a worker thread."""
+        if self._db is None:
+            return self.get(key, default)
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = _MISSING) -> None:
+        """set() for async callers: the disk tier is written in a worker thread."""
+        if self._db is None:
+            self.set(key, value, ttl)
+        else:
+            await asyncio.to_thread(self.set, key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE namespace = ?", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "bytes": self._memory_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "disk": self._db is not None,
+            }
+
+    def _drop(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _memory_put(self, key: str, expires_at: Optional[float], size: int, value: Any) -> None:
+        self._drop(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._memory[key] = (expires_at, size, value)
+        self._memory_bytes += size
+        while self._memory and (
+            len(self._memory) > self.max_entries
+            or (self.max_bytes is not None and self._memory_bytes > self.max_bytes)
+        ):
+            _, (_, evicted_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.evictions += 1
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._db is None:
+            return _MISSING
+        try:
+            row = self._db.execute(
+                "SELECT value, size, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.name, key),
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            raw, size, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, key))
+                return _MISSING
+            self._db.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, self.name, key)
+            )
+            value = json.loads(raw)
+            self._memory_put(key, expires_at, size, value)
+            return value
+        except sqlite3.Error as e:
+            logger.warning("[CACHE:%s] Disk read failed: %s", self.name, e)
+            return _MISSING
+
+    def _disk_put(self, key: str, raw: str, size: int, expires_at: Optional[float]) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.name, key, raw, size, expires_at, time.time()),
+            )
+            if self.disk_max_bytes is not None:
+                self._disk_evict()
+        except sqlite3.Error as e:
+            logger.warning("[CACHE:%s] Disk write failed: %s", self.name, e)
+
+    def _disk_evict(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?", (self.name,)
+        ).fetchone()
+        if total <= self.disk_max_bytes:
+            return
+        self._db.execute("DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                         (self.name, time.time()))
+        rows = self._db.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at", (self.name,)
+        ).fetchall()
+        total = sum(size for _, size in rows)
+        stale = []
+        for key, size in rows:
+            if total <= self.disk_max_bytes:
+                break
+            stale.append((self.name, key))
+            total -= size
+        if stale:
+            self._db.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", stale)
+            self.evictions += len(stale)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every cache created in this process, keyed by cache name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterator, Optional, Sequence, Set, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+# "memory" keeps sessions in this process; "sqlite" shares them between workers on the host
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory").lower()
+CHECKPOINT_DB_PATH = os.getenv(
+    "CHECKPOINT_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "checkpoints.sqlite")
+)
+CHECKPOINT_MAX_MB = int(os.getenv("CHECKPOINT_MAX_MB", "512"))
+CHECKPOINT_SESSION_TTL = float(os.getenv("CHECKPOINT_SESSION_TTL", str(24 * 3600)))
+CHECKPOINT_HISTORY = int(os.getenv("CHECKPOINT_HISTORY", "3"))
+# "exit" writes one checkpoint per request instead of one per node step
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY") or ("exit" if CHECKPOINTER == "sqlite" else "async")
+
+
+def _size(typed: Tuple[str, bytes]) -> int:
+    return len(typed[1])
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver with bounded memory.
+
+    - history: only the latest `max_checkpoints` checkpoints (and their pending
+      writes and channel blobs) are kept per thread; older ones are compacted away
+    - ttl: sessions untouched for `ttl` seconds are dropped
+    - max_bytes: least recently used sessions are evicted once the serialized
+      size of all sessions exceeds the budget (the session being written is kept)
+
+    Resuming a session only needs its latest checkpoint, so live sessions behave
+    exactly as with MemorySaver. An evicted or expired session looks new.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_checkpoints: Optional[int] = None,
+    ):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_checkpoints = max(1, max_checkpoints) if max_checkpoints else None
+        self._lock = threading.RLock()
+        # thread_id -> [bytes, last_access]; ordered least recently used first
+        self._threads: "OrderedDict[str, list]" = OrderedDict()
+        self._blob_keys: Dict[str, Set[tuple]] = defaultdict(set)
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compacted = 0
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._expire(time.time())
+            result = super().get_tuple(config)
+            if thread_id in self._threads:
+                self._touch(thread_id)
+            elif not self.storage.get(thread_id):
+                self.storage.pop(thread_id, None)
+            return result
+
+    def list(self, config: Optional[RunnableConfig], **kwargs: Any) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            self._expire(time.time())
+            items = list(super().list(config, **kwargs))
+        yield from items
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            self._blob_keys[thread_id].update((thread_id, checkpoint_ns, k, v) for k, v in new_versions.items())
+            self._compact(thread_id, checkpoint_ns)
+            self._account(thread_id)
+            self._enforce(thread_id)
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._account(thread_id)
+            self._enforce(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+                for checkpoint_id in checkpoints:
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for key in self._blob_keys.pop(thread_id, ()):
+                self.blobs.pop(key, None)
+            entry = self._threads.pop(thread_id, None)
+            if entry is not None:
+                self._bytes -= entry[0]
+
+    def _touch(self, thread_id: str) -> None:
+        self._threads[thread_id][1] = time.time()
+        self._threads.move_to_end(thread_id)
+
+    def _compact(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop checkpoints beyond the latest max_checkpoints, and blobs no kept checkpoint references."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if self.max_checkpoints is None or len(checkpoints) <= self.max_checkpoints:
+            return
+        # checkpoint ids are monotonic (uuid6), so sorting orders them by age
+        stale = sorted(checkpoints)[:-self.max_checkpoints]
+        for checkpoint_id in stale:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        live = set()
+        for saved in checkpoints.values():
+            versions = self.serde.loads_typed(saved[0])["channel_versions"]
+            live.update((thread_id, checkpoint_ns, k, v) for k, v in versions.items())
+        keys = self._blob_keys[thread_id]
+        for key in [k for k in keys if k[1] == checkpoint_ns and k not in live]:
+            self.blobs.pop(key, None)
+            keys.discard(key)
+        self.compacted += len(stale)
+
+    def _account(self, thread_id: str) -> None:
+        size = 0
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            for checkpoint_id, (checkpoint, metadata, _) in checkpoints.items():
+                size += _size(checkpoint) + _size(metadata)
+                for _, _, value, _ in self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                    size += _size(value)
+        for key in self._blob_keys.get(thread_id, ()):
+            blob = self.blobs.get(key)
+            if blob is not None:
+                size += _size(blob)
+        entry = self._threads.get(thread_id)
+        if entry is None:
+            entry = self._threads[thread_id] = [0, 0.0]
+        self._bytes += size - entry[0]
+        entry[0] = size
+        self._touch(thread_id)
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        while self._threads:
+            thread_id, (_, last_access) = next(iter(self._threads.items()))
+            if now - last_access <= self.ttl:
+                break
+            self.delete_thread(thread_id)
+            self.expirations += 1
+            logger.info("[CHECKPOINT] Expired session %s (idle > %ds)", thread_id, self.ttl)
+
+    def _enforce(self, current: str) -> None:
+        self._expire(time.time())
+        if self.max_bytes is None:
+            return
+        for thread_id in list(self._threads):
+            if self._bytes <= self.max_bytes:
+                break
+            if thread_id == current:
+                continue
+            freed = self._threads[thread_id][0]
+            self.delete_thread(thread_id)
+            self.evictions += 1
+            logger.info("[CHECKPOINT] Evicted session %s (%d bytes) | total_bytes=%d", thread_id, freed, self._bytes)
+        if self._bytes > self.max_bytes:
+            logger.warning("[CHECKPOINT] Session %s alone exceeds the checkpoint budget (%d > %d bytes)",
+                           current, self._bytes, self.max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory gauge: sessions held, serialized bytes and eviction counters."""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._threads),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "checkpoints": sum(len(c) for ns in self.storage.values() for c in ns.values()),
+                "blobs": len(self.blobs),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "compacted_checkpoints": self.compacted,
+            }
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Checkpointer used by the graph, selected by CHECKPOINTER and bounded by the CHECKPOINT_* settings."""
+    if CHECKPOINTER == "sqlite":
+        from utils.checkpoint_sqlite import SharedSqliteSaver
+        return SharedSqliteSaver(
+            CHECKPOINT_DB_PATH,
+            ttl=CHECKPOINT_SESSION_TTL or None,
+            max_checkpoints=CHECKPOINT_HISTORY or None,
+        )
+    if CHECKPOINTER != "memory":
+        raise ValueError(f"Unknown CHECKPOINTER '{CHECKPOINTER}' (expected 'memory' or 'sqlite')")
+    return BoundedMemorySaver(
+        max_bytes=CHECKPOINT_MAX_MB * 1024 * 1024,
+        ttl=CHECKPOINT_SESSION_TTL or None,
+        max_checkpoints=CHECKPOINT_HISTORY or None,
+    )
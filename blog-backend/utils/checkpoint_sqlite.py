@@ -0,0 +1,179 @@
+import os
+import time
+import zlib
+import asyncio
+import sqlite3
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+logger = logging.getLogger(__name__)
+
+_ZLIB_SUFFIX = "+zlib"
+
+
+class CompressedSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer whose payloads larger than min_size are zlib-compressed."""
+
+    def __init__(self, min_size: int = 1024, level: int = 6):
+        super().__init__()
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if len(data) >= self.min_size:
+            return type_ + _ZLIB_SUFFIX, zlib.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_ZLIB_SUFFIX):
+            return super().loads_typed((type_[:-len(_ZLIB_SUFFIX)], zlib.decompress(payload)))
+        return super().loads_typed(data)
+
+
+class SharedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver for several worker processes on one host.
+
+    - the database runs in WAL mode with a busy timeout, so workers read
+      concurrently and wait for each other's writes instead of failing
+    - checkpoints are compressed (CompressedSerializer)
+    - each thread keeps only its latest max_checkpoints checkpoints
+    - sessions untouched for ttl seconds are swept at most every sweep_interval
+    - async methods run the sync ones in a worker thread, so the event loop
+      never blocks on disk I/O
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_checkpoints: Optional[int] = None,
+        sweep_interval: float = 60.0,
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(conn, serde=CompressedSerializer())
+        self.path = path
+        self.ttl = ttl
+        self.max_checkpoints = max(1, max_checkpoints) if max_checkpoints else None
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self.expirations = 0
+        self.compacted = 0
+        logger.info("[CHECKPOINT] SQLite checkpointer at %s", path)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+        self.conn.commit()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        now = time.time()
+        with self.cursor() as cur:
+            cur.execute("INSERT OR REPLACE INTO sessions (thread_id, updated_at) VALUES (?, ?)", (thread_id, now))
+            if self.max_checkpoints is not None:
+                self._compact(cur, thread_id, checkpoint_ns)
+            if self.ttl is not None and now - self._last_sweep >= self.sweep_interval:
+                self._last_sweep = now
+                self._sweep(cur, now - self.ttl)
+        return result
+
+    def _compact(self, cur: sqlite3.Cursor, thread_id: str, checkpoint_ns: str) -> None:
+        cur.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.max_checkpoints),
+        )
+        stale = [(thread_id, checkpoint_ns, row[0]) for row in cur.fetchall()]
+        if not stale:
+            return
+        cur.executemany("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale)
+        cur.executemany("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale)
+        self.compacted += len(stale)
+
+    def _sweep(self, cur: sqlite3.Cursor, cutoff: float) -> None:
+        cur.execute("SELECT thread_id FROM sessions WHERE updated_at < ?", (cutoff,))
+        expired = cur.fetchall()
+        if not expired:
+            return
+        cur.executemany("DELETE FROM checkpoints WHERE thread_id = ?", expired)
+        cur.executemany("DELETE FROM writes WHERE thread_id = ?", expired)
+        cur.executemany("DELETE FROM sessions WHERE thread_id = ?", expired)
+        self.expirations += len(expired)
+        logger.info("[CHECKPOINT] Expired %d idle sessions", len(expired))
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM sessions WHERE thread_id = ?", (str(thread_id),))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs: Any) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, **kwargs)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sessions, rows and on-disk size of the checkpoint database."""
+        with self.cursor(transaction=False) as cur:
+            sessions = cur.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            checkpoints = cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            writes = cur.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+            page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": sessions,
+            "checkpoints": checkpoints,
+            "writes": writes,
+            "bytes": page_count * page_size,
+            "expirations": self.expirations,
+            "compacted_checkpoints": self.compacted,
+        }
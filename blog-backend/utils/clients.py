@@ -0,0 +1,212 @@
+import os
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from perplexity import AsyncPerplexity
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+# Max connections per provider pool; override with <PROVIDER>_POOL_SIZE.
+POOL_DEFAULTS = {
+    "perplexity": 8,
+    "gemini": 4,
+    "deepseek": 16,
+}
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "120"))
+
+
+def _pool_size(provider: str) -> int:
+    return int(os.getenv(f"{provider.upper()}_POOL_SIZE", str(POOL_DEFAULTS[provider])))
+
+
+class _PoolCounters:
+    """Request counters shared by the sync and async transports of one provider."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def begin(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def end(self, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+
+def _pool_connections(transport: httpx.BaseTransport) -> Dict[str, int]:
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.counters.begin()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.counters.end(failed)
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.counters.begin()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.counters.end(failed)
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of provider clients backed by keep-alive connection pools.
+
+    Each provider (perplexity, gemini, deepseek) gets an async httpx pool and,
+    when its SDK needs one, a sync pool, created lazily and shared by every request in the process, so
+    TLS sessions are reused instead of re-established per call. start() and
+    aclose() are wired to the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, _PoolCounters] = {p: _PoolCounters() for p in POOL_DEFAULTS}
+        self._http: Dict[str, httpx.Client] = {}
+        self._async_http: Dict[str, httpx.AsyncClient] = {}
+        self._async_perplexity: Optional[AsyncPerplexity] = None
+        self._gemini: Optional[genai.Client] = None
+
+    def _limits(self, provider: str) -> httpx.Limits:
+        size = _pool_size(provider)
+        return httpx.Limits(
+            max_connections=size,
+            max_keepalive_connections=size,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+    def http_client(self, provider: str) -> httpx.Client:
+        with self._lock:
+            client = self._http.get(provider)
+            if client is None:
+                transport = _CountingTransport(self._counters[provider], limits=self._limits(provider))
+                client = httpx.Client(transport=transport, timeout=self._timeout(), follow_redirects=True)
+                self._http[provider] = client
+                logger.info("[CLIENTS] Created %s HTTP pool (max_connections=%d)", provider, _pool_size(provider))
+            return client
+
+    def async_http_client(self, provider: str) -> httpx.AsyncClient:
+        with self._lock:
+            client = self._async_http.get(provider)
+            if client is None:
+                transport = _AsyncCountingTransport(self._counters[provider], limits=self._limits(provider))
+                client = httpx.AsyncClient(transport=transport, timeout=self._timeout(), follow_redirects=True)
+                self._async_http[provider] = client
+                logger.info("[CLIENTS] Created %s async HTTP pool (max_connections=%d)", provider, _pool_size(provider))
+            return client
+
+    def async_perplexity(self) -> AsyncPerplexity:
+        if self._async_perplexity is None:
+            api_key = os.getenv("PERPLEXITY_API_KEY")
+            if not api_key:
+                raise ValueError("PERPLEXITY_API_KEY environment variable is required for web search")
+            http_client = self.async_http_client("perplexity")
+            with self._lock:
+                if self._async_perplexity is None:
+                    self._async_perplexity = AsyncPerplexity(api_key=api_key, http_client=http_client)
+        return self._async_perplexity
+
+    def gemini(self) -> Optional[genai.Client]:
+        """
+        Returns the shared Gemini client, or None when GOOGLE_API_KEY is not configured.
+        Async calls go through client.aio, which uses the async pool.
+        """
+        if self._gemini is None:
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                return None
+            http_options = types.HttpOptions(
+                httpx_client=self.http_client("gemini"),
+                httpx_async_client=self.async_http_client("gemini"),
+            )
+            with self._lock:
+                if self._gemini is None:
+                    self._gemini = genai.Client(api_key=api_key, http_options=http_options)
+        return self._gemini
+
+    def start(self):
+        """Create the pools for every configured provider up front."""
+        for provider, env_key in (("perplexity", "PERPLEXITY_API_KEY"), ("gemini", "GOOGLE_API_KEY"), ("deepseek", "DEEPSEEK_API_KEY")):
+            if os.getenv(env_key):
+                if provider != "perplexity":  # search only uses the async client
+                    self.http_client(provider)
+                self.async_http_client(provider)
+        logger.info("[CLIENTS] Registry started | providers=%s", sorted(self._async_http))
+
+    async def aclose(self):
+        """
+        Close every pool. Pools and the provider clients on them are recreated
+        lazily if used again; model_config.get_llm rebuilds its chat model then.
+        """
+        with self._lock:
+            http, self._http = self._http, {}
+            async_http, self._async_http = self._async_http, {}
+            self._async_perplexity = None
+            self._gemini = None
+        for client in http.values():
+            client.close()
+        for client in async_http.values():
+            await client.aclose()
+        logger.info("[CLIENTS] Registry closed | pools=%d", len(http) + len(async_http))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider pool usage: configured size, open/idle/active connections and request counters."""
+        out: Dict[str, Any] = {}
+        for provider, counters in self._counters.items():
+            sync_client = self._http.get(provider)
+            async_client = self._async_http.get(provider)
+            out[provider] = {
+                "max_connections": _pool_size(provider),
+                "requests": counters.requests,
+                "errors": counters.errors,
+                "in_flight": counters.in_flight,
+                "sync_pool": _pool_connections(sync_client._transport) if sync_client else None,
+                "async_pool": _pool_connections(async_client._transport) if async_client else None,
+            }
+        return out
+
+
+registry = ClientRegistry()
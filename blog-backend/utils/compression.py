@@ -0,0 +1,104 @@
+import gzip
+import logging
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+_SKIPPED_TYPES = ("text/event-stream",)
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+def _weak_etag(etag: bytes) -> bytes:
+    # the encoded bytes differ from the ones the strong ETag was computed for
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text response bodies of at least
+    min_size bytes with brotli (when the brotli package is installed and the
+    client accepts it) or gzip.
+
+    Streaming responses (SSE) and already-encoded bodies pass through untouched,
+    so event delivery is never delayed by buffering. The ETag of a compressed
+    body is weakened (W/), since it no longer names the exact bytes sent.
+    """
+
+    def __init__(self, app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = _choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def _send(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                response_headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in response_headers
+                    or content_type.startswith(_SKIPPED_TYPES)
+                    or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            start_headers = [(k, v) for k, v in start_message.get("headers", []) if k.lower() != b"content-length"]
+            if len(body) >= self.min_size:
+                compressed = _compress(body, encoding, self.gzip_level, self.brotli_quality)
+                if len(compressed) < len(body):
+                    body = compressed
+                    start_headers = [(k, _weak_etag(v) if k.lower() == b"etag" else v) for k, v in start_headers]
+                    start_headers.append((b"content-encoding", encoding.encode("latin-1")))
+            start_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            start_headers.append((b"vary", b"Accept-Encoding"))
+            await send({**start_message, "headers": start_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, _send)
@@ -0,0 +1,109 @@
+import re
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Whole-message approvals once punctuation, emoji and filler words are removed.
+_APPROVAL_PHRASES = {
+    "approve", "approved", "i approve", "looks good", "look good", "looks great", "looks fine",
+    "looks perfect", "lgtm", "good", "great", "perfect", "fine", "nice", "excellent", "awesome",
+    "ok", "okay", "k", "yes", "yep", "yeah", "yup", "sure", "correct", "agreed", "done",
+    "go ahead", "go on", "proceed", "continue", "next", "move on", "lets go", "let's go",
+    "sounds good", "all good", "good to go", "ship it", "that works", "this works", "works for me",
+    "thats fine", "that's fine", "thats good", "that's good", "this is good", "this is great",
+    "it's good", "its good", "love it", "i like it", "no changes", "no changes needed",
+    "nothing to change", "no further changes", "don't change anything", "dont change anything",
+    "great job", "good job", "nice work", "well done", "write", "write it", "write the article", "generate the article", "publish", "finalize",
+}
+_FILLER_WORDS = {"please", "thanks", "thank", "you", "thx", "so", "far", "now", "very", "really",
+                 "all", "it", "this", "that", "the", "outline", "article", "draft", "and", "then", "just"}
+# Words that only show up when the user wants something changed.
+_EDIT_WORDS = {
+    "add", "remove", "delete", "drop", "change", "replace", "rewrite", "rephrase", "reword",
+    "shorten", "shorter", "lengthen", "longer", "expand", "elaborate", "include", "exclude",
+    "fix", "update", "rename", "reorder", "move", "merge", "split", "swap", "edit", "modify",
+    "instead", "more", "less", "fewer", "tweak", "adjust", "simplify", "improve", "correct",
+    "mention", "focus", "emphasize", "cut", "trim", "combine", "revise", "redo", "regenerate",
+}
+_CONTRAST_WORDS = {"but", "however", "except", "although", "though"}
+_NEGATIONS = {"no", "not", "don't", "dont", "never", "nope", "nah"}
+_WORD_RE = re.compile(r"[a-z']+")
+
+MAX_RULE_WORDS = 40
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower().replace("’", "'")))
+
+
+def _is_approval(words: list) -> bool:
+    """True when the words split entirely into approval phrases ("yes" + "go ahead")."""
+    if not words:
+        return False
+    reachable = [True] + [False] * len(words)
+    for end in range(1, len(words) + 1):
+        for start in range(max(0, end - 4), end):
+            if reachable[start] and " ".join(words[start:end]) in _APPROVAL_PHRASES:
+                reachable[end] = True
+                break
+    return reachable[-1]
+
+
+def classify_feedback(text: str) -> Optional[str]:
+    """
+    Deterministic APPROVE / EDIT classification of a user reply.
+
+    Returns "APPROVE" for short, unambiguous approvals ("looks good", "yes go
+    ahead"), "EDIT" for replies that clearly ask for a change ("add a section
+    on pricing", "looks good but make it shorter"), and None when the reply
+    is ambiguous (questions, negations, long or unfamiliar text), in which
+    case the LLM router decides.
+    """
+    normalized = _normalize(text)
+    if not normalized or "?" in text:
+        return None
+    if normalized in _APPROVAL_PHRASES:
+        return "APPROVE"
+    words = normalized.split()
+    if len(words) > MAX_RULE_WORDS:
+        return None
+
+    if _is_approval(words) or _is_approval([w for w in words if w not in _FILLER_WORDS]):
+        return "APPROVE"
+
+    has_edit = any(w in _EDIT_WORDS for w in words)
+    has_negation = any(w in _NEGATIONS for w in words)
+    if has_edit and not has_negation:
+        return "EDIT"
+    if has_edit and any(w in _CONTRAST_WORDS for w in words):
+        # "no, but add ..." still asks for a change
+        return "EDIT"
+    return None
+
+
+class DecisionCounters:
+    """Per-router counts of decisions by source (rule or llm) and action."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, router: str, source: str, action: str) -> None:
+        with self._lock:
+            self._counts[router][f"{source}_{action.lower()}"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            out = {}
+            for router, counts in self._counts.items():
+                rule = sum(v for k, v in counts.items() if k.startswith("rule_"))
+                total = sum(counts.values())
+                out[router] = {**counts, "total": total,
+                               "rule_ratio": round(rule / total, 4) if total else 0.0}
+            return out
+
+
+decision_counters = DecisionCounters()
@@ -0,0 +1,139 @@
+import os
+import asyncio
+import logging
+import threading
+import warnings
+from collections import defaultdict
+from typing import Any, Dict, Optional, Sequence
+
+from dotenv import load_dotenv
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from utils.cache import TTLCache, make_key
+from utils.metrics import current_node
+
+logger = logging.getLogger(__name__)
+warnings.filterwarnings("ignore", message="The function `loads` is in beta", category=LangChainBetaWarning)
+
+
+load_dotenv('.env')
+
+# "on" reads and writes the cache, "off" disables it, "replay" serves every call from the
+# cache and raises LLMCacheMiss instead of calling the provider.
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "on").lower()
+# "memory" keeps responses in the worker; "sqlite" adds a tier shared by workers and restarts.
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "llm.sqlite")
+)
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_MEMORY_MB = int(os.getenv("LLM_CACHE_MEMORY_MB", "64"))
+LLM_CACHE_DISK_MAX_MB = int(os.getenv("LLM_CACHE_DISK_MAX_MB", "256"))
+# Comma-separated graph nodes whose LLM calls are cached, or "*" for every node.
+LLM_CACHE_NODES = os.getenv("LLM_CACHE_NODES", "*")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match LangChain cache for chat model responses.
+
+    Keyed by a hash of the model's llm_string (model name, temperature and
+    other invocation params) and the serialized messages, so retried requests,
+    double submits and repeated router inputs are answered without a provider
+    call. Responses are stored in a TTLCache; per-node enable flags are
+    checked against `current_node`. Replay mode ignores the flags, never
+    writes and raises LLMCacheMiss on a miss.
+    """
+
+    def __init__(self, store: TTLCache, mode: str = "on", nodes: Optional[set] = None):
+        self.store = store
+        self.mode = mode
+        self.nodes = nodes
+        self._offload = store.has_disk
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _enabled(self, node: Optional[str]) -> bool:
+        return self.mode == "replay" or self.nodes is None or node in self.nodes
+
+    def _count(self, node: Optional[str], outcome: str) -> None:
+        with self._lock:
+            self._counts[node or "unknown"][outcome] += 1
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        node = current_node.get()
+        if not self._enabled(node):
+            self._count(node, "bypass")
+            return None
+        cached = self.store.get(make_key(llm_string, prompt))
+        if cached is not None:
+            generations = [loads(raw) for raw in cached]
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is not None:
+                    message.response_metadata = {**message.response_metadata, "cache_hit": True}
+            self._count(node, "hit")
+            logger.info("[LLM_CACHE] hit | node=%s", node)
+            return generations
+        self._count(node, "miss")
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded LLM response for node={node} (LLM_CACHE_MODE=replay)")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.mode == "replay" or not self._enabled(current_node.get()):
+            return
+        self.store.set(make_key(llm_string, prompt), [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self._offload:
+            return await asyncio.to_thread(self.lookup, prompt, llm_string)
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self._offload:
+            await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+        else:
+            self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_node = {node: dict(counts) for node, counts in self._counts.items()}
+        return {"mode": self.mode, "nodes": sorted(self.nodes) if self.nodes else "*", "by_node": by_node}
+
+
+def build_llm_cache() -> Optional[LLMResponseCache]:
+    if LLM_CACHE_MODE == "off":
+        return None
+    if LLM_CACHE_MODE not in ("on", "replay"):
+        raise ValueError(f"Unknown LLM_CACHE_MODE '{LLM_CACHE_MODE}' (expected on, off or replay)")
+    if LLM_CACHE_BACKEND not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown LLM_CACHE_BACKEND '{LLM_CACHE_BACKEND}' (expected memory or sqlite)")
+    store = TTLCache(
+        "llm",
+        ttl=LLM_CACHE_TTL or None,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        max_bytes=LLM_CACHE_MEMORY_MB * 1024 * 1024,
+        path=LLM_CACHE_PATH if LLM_CACHE_BACKEND == "sqlite" else None,
+        disk_max_bytes=LLM_CACHE_DISK_MAX_MB * 1024 * 1024,
+    )
+    nodes = None if LLM_CACHE_NODES.strip() in ("", "*") else {n.strip() for n in LLM_CACHE_NODES.split(",") if n.strip()}
+    logger.info("[LLM_CACHE] mode=%s | backend=%s | nodes=%s", LLM_CACHE_MODE, LLM_CACHE_BACKEND, LLM_CACHE_NODES)
+    return LLMResponseCache(store, mode=LLM_CACHE_MODE, nodes=nodes)
+
+
+llm_cache = build_llm_cache()
@@ -0,0 +1,154 @@
+import os
+import queue
+import atexit
+import random
+import hashlib
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, List, Union
+
+from dotenv import load_dotenv
+
+from utils.metrics import current_node
+
+load_dotenv('.env')
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+# Hand records to a background thread instead of writing to the console / file in the caller.
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() == "true"
+LOG_FILE_MAX_MB = int(os.getenv("LOG_FILE_MAX_MB", "2"))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "5"))
+# How prompts and LLM outputs appear in the app log: "truncate", "hash", "full" or "off".
+LOG_PAYLOAD_MODE = os.getenv("LOG_PAYLOAD_MODE", "truncate").lower()
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+# Optional separate log with complete payloads for a sample of LLM calls.
+PAYLOAD_LOG_PATH = os.getenv("PAYLOAD_LOG_PATH", "")
+PAYLOAD_LOG_SAMPLE_RATE = float(os.getenv("PAYLOAD_LOG_SAMPLE_RATE", "0.1"))
+PAYLOAD_LOG_MAX_MB = int(os.getenv("PAYLOAD_LOG_MAX_MB", "50"))
+
+payload_logger = logging.getLogger("payloads")
+payload_logger.propagate = False
+
+_listeners: List[QueueListener] = []
+_configured = False
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats every record in the calling thread so it can be
+    pickled; our queue never leaves the process, so the record is queued as is
+    and message building (including lazy payloads) happens in the background.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()[:16]
+
+
+def _summarize(text: str, mode: str) -> str:
+    if mode == "hash":
+        return f"<{len(text)} chars | sha256={_digest(text)}>"
+    if mode == "truncate" and len(text) > LOG_PAYLOAD_MAX_CHARS:
+        return f"{text[:LOG_PAYLOAD_MAX_CHARS]} …[+{len(text) - LOG_PAYLOAD_MAX_CHARS} chars | sha256={_digest(text)}]"
+    return text
+
+
+class _Payload:
+    """Log argument rendered only when a handler formats the record."""
+
+    __slots__ = ("_render", "_mode")
+
+    def __init__(self, render: Callable[[str], str], mode: str):
+        self._render = render
+        self._mode = mode
+
+    def __str__(self) -> str:
+        return self._render(self._mode)
+
+
+def prompt_payload(template: str, prompt_vars: Dict[str, Any]) -> Callable[[str], str]:
+    """
+    Deferred rendering of a prompt. In truncate mode each variable is cut before
+    the template is filled, so the full prompt is never built just to be logged.
+    """
+    prompt_vars = dict(prompt_vars)
+
+    def render(mode: str) -> str:
+        if mode == "truncate":
+            return template.format(**{k: _summarize(v, mode) if isinstance(v, str) else v for k, v in prompt_vars.items()})
+        return _summarize(template.format(**prompt_vars), mode)
+
+    return render
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Union[str, Callable[[str], str]]) -> None:
+    """
+    Log an LLM prompt or response. The app log gets it in LOG_PAYLOAD_MODE form;
+    a PAYLOAD_LOG_SAMPLE_RATE share of calls also go to the payload log in full.
+    Nothing is rendered unless a record is actually emitted.
+    """
+    render = payload if callable(payload) else (lambda mode, text=payload: _summarize(text, mode))
+    if LOG_PAYLOAD_MODE != "off" and logger.isEnabledFor(logging.INFO):
+        logger.info("%s\n%s", label, _Payload(render, LOG_PAYLOAD_MODE))
+    if payload_logger.handlers and random.random() < PAYLOAD_LOG_SAMPLE_RATE:
+        payload_logger.info("%s | node=%s\n%s", label, current_node.get(), _Payload(render, "full"))
+
+
+def _attach(logger: logging.Logger, handlers: List[logging.Handler]) -> None:
+    if LOG_QUEUE:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+        logger.addHandler(_DeferredQueueHandler(records))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+
+def _file_handler(path: str, max_mb: int) -> RotatingFileHandler:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=max_mb * 1024 * 1024, backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+    handler.setLevel(logging.INFO)
+    return handler
+
+
+def setup_logging() -> None:
+    """Console + rotating file logging (and the optional payload log), written by background listeners."""
+    global _configured
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    if _configured:
+        return
+    _configured = True
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = []
+    if not any(isinstance(h, logging.StreamHandler) for h in root.handlers):
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        handlers.append(console)
+    handlers.append(_file_handler(os.path.join(LOGS_DIR, "app.log"), LOG_FILE_MAX_MB))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    _attach(root, handlers)
+
+    if PAYLOAD_LOG_PATH and PAYLOAD_LOG_SAMPLE_RATE > 0:
+        payload_handler = _file_handler(PAYLOAD_LOG_PATH, PAYLOAD_LOG_MAX_MB)
+        payload_handler.setFormatter(formatter)
+        _attach(payload_logger, [payload_handler])
+
+    if _listeners:
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background writers."""
+    while _listeners:
+        _listeners.pop().stop()
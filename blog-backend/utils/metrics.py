@@ -0,0 +1,313 @@
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.tracing import record_span, span
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Graph node currently running; set by instrument_node and read by the LLM cache, payload log and metrics.
+current_node: ContextVar[Optional[str]] = ContextVar("current_node", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or read from `callback` (returning {label values: value}) at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                items = sorted(self._callback().items())
+            except Exception as e:
+                logger.warning("[METRICS] Gauge %s callback failed: %s", self.name, e)
+                items = []
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts, then +Inf count and sum
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}")
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {repr(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+node_duration = registry.register(Histogram(
+    "blog_node_duration_seconds", "Graph node wall-clock duration.", ("node",)))
+node_runs = registry.register(Counter(
+    "blog_node_runs_total", "Graph node runs by outcome.", ("node", "outcome")))
+nodes_in_flight = registry.register(Gauge(
+    "blog_nodes_in_flight", "Graph nodes currently running.", ("node",)))
+call_duration = registry.register(Histogram(
+    "blog_external_call_duration_seconds", "Latency of calls to external providers.", ("provider", "operation")))
+call_total = registry.register(Counter(
+    "blog_external_calls_total", "Calls to external providers by outcome (ok, error).", ("provider", "operation", "outcome")))
+http_duration = registry.register(Histogram(
+    "blog_http_request_duration_seconds", "HTTP request duration, including streamed bodies.", ("method", "route", "status")))
+http_in_flight = registry.register(Gauge(
+    "blog_http_requests_in_flight", "HTTP requests currently being served."))
+sessions_in_flight = registry.register(Gauge(
+    "blog_sessions_in_flight", "Sessions with a graph run or image generation in progress."))
+prompt_tokens = registry.register(Counter(
+    "blog_llm_prompt_tokens_total", "Prompt tokens reported by the LLM provider.", ("node",)))
+completion_tokens = registry.register(Counter(
+    "blog_llm_completion_tokens_total", "Completion tokens reported by the LLM provider.", ("node",)))
+
+
+def instrument_node(name: str):
+    """
+    Decorator for async graph nodes: sets current_node, opens a trace span,
+    records the duration histogram, outcome counter and in-flight gauge, and
+    logs wall-clock start / end so concurrent branches show their overlap.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started_at = time.time()
+            start = perf_counter()
+            token = current_node.set(name)
+            nodes_in_flight.inc(node=name)
+            outcome = "error"
+            try:
+                with span(name, "node"):
+                    result = await fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                elapsed = perf_counter() - start
+                current_node.reset(token)
+                nodes_in_flight.dec(node=name)
+                node_duration.observe(elapsed, node=name)
+                node_runs.inc(node=name, outcome=outcome)
+                logger.info("[TIMING] node=%s | start=%.3f | end=%.3f | duration_ms=%d",
+                            name, started_at, time.time(), int(elapsed * 1000))
+        return wrapper
+    return decorator
+
+
+def record_call(provider: str, operation: str, seconds: float, ok: bool) -> None:
+    record_span(f"{provider}.{operation}", "call", seconds, ok)
+    call_duration.observe(seconds, provider=provider, operation=operation)
+    call_total.inc(provider=provider, operation=operation, outcome="ok" if ok else "error")
+
+
+@contextmanager
+def track_call(provider: str, operation: str) -> Iterator[None]:
+    """Time an external call; an exception escaping the block counts as an error."""
+    start = perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_call(provider, operation, perf_counter() - start, ok)
+
+
+_active_sessions: Dict[str, int] = {}
+_sessions_lock = threading.Lock()
+
+
+@contextmanager
+def track_session(session_id: str) -> Iterator[None]:
+    """Count a session as in flight for the duration of the block (concurrent requests count once)."""
+    with _sessions_lock:
+        _active_sessions[session_id] = _active_sessions.get(session_id, 0) + 1
+        sessions_in_flight.set(len(_active_sessions))
+    try:
+        yield
+    finally:
+        with _sessions_lock:
+            remaining = _active_sessions.get(session_id, 1) - 1
+            if remaining > 0:
+                _active_sessions[session_id] = remaining
+            else:
+                _active_sessions.pop(session_id, None)
+            sessions_in_flight.set(len(_active_sessions))
+
+
+class LLMCallMetrics(BaseCallbackHandler):
+    """
+    LangChain callback recording every chat model call as an external call of
+    `provider`. Responses served from the LLM response cache are counted under
+    operation "chat_cached" so provider latency is not skewed by them.
+    """
+
+    run_inline = True
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._started.pop(run_id, None)
+        if start is None:
+            return
+        generations = [g for batch in response.generations for g in batch]
+        message = getattr(generations[0], "message", None) if generations else None
+        cached = bool(message is not None and (message.response_metadata or {}).get("cache_hit"))
+        record_call(self.provider, "chat_cached" if cached else "chat", perf_counter() - start, True)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            record_call(self.provider, "chat", perf_counter() - start, False)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method, route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            http_duration.observe(perf_counter() - start, method=scope.get("method", ""),
+                                  route=getattr(route, "path", "unmatched"), status=str(status["code"]))
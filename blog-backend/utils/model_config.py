@@ -1,32 +1,103 @@
 import os
+import asyncio
 import logging
+import threading
 from langchain_deepseek import ChatDeepSeek
 #from langchain_anthropic import ChatAnthropic
 #from langchain_google_genai import ChatGoogleGenerativeAI
 #from langchain_xai import ChatXAI
-from google import genai
 from utils.prompts import image_prompt
-import base64
 from langsmith import traceable
 from google.genai import types
+from utils.clients import registry
+from utils.blobs import blob_store
+from utils.llm_cache import LLM_CACHE_MODE, llm_cache
+from utils.metrics import LLMCallMetrics, track_call
 logger = logging.getLogger(__name__)
 
-def get_llm():
+_llm_lock = threading.Lock()
+_llm = None
+_llm_pools = None
+
+
+def _chat_model(http_client, http_async_client):
     ai_api_key = os.getenv("DEEPSEEK_API_KEY")
+    if not ai_api_key and LLM_CACHE_MODE == "replay":
+        # replay mode serves every call from the response cache and never reaches the API
+        ai_api_key = "replay"
     if not ai_api_key:
         raise ValueError("DEEPSEEK_API_KEY environment variable is required")
     logger.info(f"Initializing DeepSeek LLM: model='deepseek-reasoner'")
-    llm = ChatDeepSeek(
+    return ChatDeepSeek(
         model="deepseek-chat",
         api_key=ai_api_key,
         temperature=0.6,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=llm_cache,
+        callbacks=[LLMCallMetrics("deepseek")],
     )
-    return llm
 
-@traceable(name="generate_images", run_type="tool")
-def generate_images(title: str, tone: str, target_audience: str, number_of_images: int = 1, user_feedback: str = "", previous_image_bytes: bytes = None):
+
+def get_llm():
+    """
+    Shared DeepSeek chat model on the registry's pools. Rebuilt when the pools
+    change, i.e. after registry.aclose() (lifespan shutdown) they were recreated,
+    so the model never holds a closed client.
+    """
+    global _llm, _llm_pools
+    pools = (registry.http_client("deepseek"), registry.async_http_client("deepseek"))
+    with _llm_lock:
+        if _llm is None or _llm_pools is None or any(a is not b for a, b in zip(pools, _llm_pools)):
+            _llm = _chat_model(*pools)
+            _llm_pools = pools
+        return _llm
+
+def _image_request(title: str, tone: str, target_audience: str, user_feedback: str = "", previous_image_bytes: bytes = None):
+    """Build the image prompt and the request contents for agenerate_images."""
+    base_prompt = image_prompt.format(
+        title=title,
+        tone=tone,
+        target_audience=target_audience
+    )
+    if user_feedback and previous_image_bytes:
+        prompt = f"{base_prompt}\n\nUser Refinement Request:\n{user_feedback}\n\nApply the user's requested changes while maintaining the overall style and quality."
+        logger.info(f"Generating images with user feedback and previous image ({len(previous_image_bytes)} bytes)")
+        contents = [
+            types.Part.from_bytes(data=previous_image_bytes, mime_type='image/png'),
+            prompt
+        ]
+    elif user_feedback:
+        # no previous image (none yet, or swept from the blob store): apply the feedback to a fresh image
+        prompt = f"{base_prompt}\n\nUser Refinement Request:\n{user_feedback}"
+        logger.info("Generating images with user feedback and no previous image")
+        contents = [prompt]
+    else:
+        prompt = base_prompt
+        logger.info("Generating images with base prompt")
+        contents = [prompt]
+    return prompt, contents
+
+
+def _extract_images(response) -> list:
+    """Store every inline image of the response in the blob store and return their hashes."""
+    image_hashes = []
+    
+    for candidate in response.candidates:
+        for part in candidate.content.parts:
+            if part.inline_data is not None:
+                img_bytes = part.inline_data.data
+                logger.info(f"Found inline_data with {len(img_bytes)} bytes")
+                image_hashes.append(blob_store.put(img_bytes, part.inline_data.mime_type or "image/png"))
+                logger.info(f"Stored image blob {image_hashes[-1]} ({len(img_bytes)} bytes)")
+    logger.info(f"Successfully generated {len(image_hashes)} images")
+    return image_hashes
+
+
+@traceable(name="agenerate_images", run_type="tool")
+async def agenerate_images(title: str, tone: str, target_audience: str, number_of_images: int = 1, user_feedback: str = "", previous_image_bytes: bytes = None):
     """
-    Generate images using Google's Gemini image generation model.
+    Generate images using Google's Gemini image generation model (async client.aio).
     
     Args:
         title (str): The blog article title
@@ -37,57 +108,24 @@ def generate_images(title: str, tone: str, target_audience: str, number_of_image
         previous_image_bytes (bytes): Optional image bytes to refine (default: None)
     
     Returns:
-        tuple: (list of base64-encoded image strings, formatted prompt string)
-              Images format: "data:image/png;base64,{base64_string}"
+        tuple: (list of image blob hashes, formatted prompt string)
+              Image bytes are served from the blob store (utils.blobs)
               Returns (empty list, empty string) if generation fails or is skipped
     """
-    google_api_key = os.getenv("GOOGLE_API_KEY")
-    if not google_api_key:
+    client = registry.gemini()
+    if client is None:
         logger.info("GOOGLE_API_KEY not configured, skipping image generation")
         return [], ""
-    
-    base_prompt = image_prompt.format(
-        title=title,
-        tone=tone,
-        target_audience=target_audience
-    )
 
     try:
-        client = genai.Client(api_key=google_api_key)
-        
-        if user_feedback and previous_image_bytes:
-            prompt = f"{base_prompt}\n\nUser Refinement Request:\n{user_feedback}\n\nApply the user's requested changes while maintaining the overall style and quality."
-            logger.info(f"Generating {number_of_images} images with user feedback and previous image ({len(previous_image_bytes)} bytes)")
-            
-            response = client.models.generate_content(
+        prompt, contents = _image_request(title, tone, target_audience, user_feedback, previous_image_bytes)
+        with track_call("gemini", "generate_images"):
+            response = await client.aio.models.generate_content(
                 model='gemini-2.5-flash-image',
-                contents=[
-                    types.Part.from_bytes(data=previous_image_bytes, mime_type='image/png'),
-                    prompt
-                ],
+                contents=contents,
             )
-        else:
-            prompt = base_prompt
-            logger.info(f"Generating {number_of_images} images with base prompt")
-            
-            response = client.models.generate_content(
-                model='gemini-2.5-flash-image',
-                contents=[prompt],
-            )
-        
-        base64_images = []
-        
-        for candidate in response.candidates:
-            for part in candidate.content.parts:
-                if part.inline_data is not None:
-                    img_bytes = part.inline_data.data
-                    logger.info(f"Found inline_data with {len(img_bytes)} bytes")
-                    img_str = base64.b64encode(img_bytes).decode('utf-8')
-                    base64_images.append(f"data:image/png;base64,{img_str}")
-                    logger.info(f"Successfully converted to base64 (size: {len(img_bytes)} bytes, base64 length: {len(img_str)} chars)")
-        logger.info(f"Successfully generated {len(base64_images)} base64 images")
-        return base64_images, prompt
-    
+        return await asyncio.to_thread(_extract_images, response), prompt
+
     except Exception as e:
         logger.error(f"Error generating images: {str(e)}")
         logger.warning("Image generation failed, returning empty list")
@@ -307,3 +307,72 @@ You MUST respond with ONLY valid JSON in this exact format:
 }}"""
 )
 
+
+
+write_section_prompt = PromptTemplate(
+    input_variables=["tone", "section_length", "target_audience", "keywords", "title", "outlines", "section", "section_description", "section_index", "section_count", "web_content", "writing_style"],
+    template="""You are writing ONE section of a #1-ranking article optimized for RankBrain, EEAT signals, and maximum user engagement. Other writers are writing the other sections in parallel, so stay strictly within your section.
+
+<tone>{tone}</tone>
+<section_length>{section_length}</section_length>
+<target_audience>{target_audience}</target_audience>
+<keywords>{keywords}</keywords>
+<title>{title}</title>
+<outlines>{outlines}</outlines>
+<section>{section}</section>
+<section_description>{section_description}</section_description>
+<position>Section {section_index} of {section_count}</position>
+<web_content>{web_content}</web_content>
+<writing_style>{writing_style}</writing_style>
+
+### Writing Style Guidelines
+- If <writing_style> is provided, STRICTLY follow the writing style characteristics described.
+- Otherwise follow the <tone> parameter and general best practices.
+- Keep voice, person and vocabulary consistent with the rest of the article described in <outlines>.
+
+### Section Rules
+- Start with "## {section}" exactly as given, then write only this section.
+- Aim for about <section_length> words.
+- Cover <section_description>; do not repeat material that belongs to other sections in <outlines>.
+- Do NOT write an article title, introduction or conclusion for the whole article unless this section is one.
+- Ground facts and statistics in <web_content>; use markdown tables, blockquotes for expert quotes and bullets where they help.
+- **Bold** 1-2 key phrases, keep paragraphs to 2-4 sentences, use "you" language, active voice.
+- NO inline citations or URLs in the content (use the citations JSON).
+
+You MUST respond with ONLY valid JSON in this exact format:
+{{
+  "content": "The section in clean markdown, starting with the ## heading",
+  "citations": [
+    {{"title": "Source Title", "url": "https://example.com", "relevance": "Specific information or data used from this source"}}
+  ]
+}}
+"""
+)
+
+assemble_article_prompt = PromptTemplate(
+    input_variables=["title", "tone", "target_audience", "keywords", "section_summaries", "writing_style"],
+    template="""You are the editor assembling an article whose sections were written independently. Write only the connective tissue.
+
+<title>{title}</title>
+<tone>{tone}</tone>
+<target_audience>{target_audience}</target_audience>
+<keywords>{keywords}</keywords>
+<writing_style>{writing_style}</writing_style>
+<sections>
+{section_summaries}
+</sections>
+
+## Instructions:
+1. Write a short introduction (2-3 sentences) that hooks the reader and uses the primary keyword in the first sentence.
+2. For every section after the first, write ONE transition sentence that bridges from the end of the previous section to the start of that section. Return them in order; there must be exactly one fewer transition than sections.
+3. Write a single, direct follow-up question asking the user to confirm the draft or request changes.
+4. Match the <tone> and <writing_style>. Do not rewrite or summarize the sections themselves.
+
+You MUST respond with ONLY valid JSON in this exact format:
+{{
+  "introduction": "Short introduction paragraph",
+  "transitions": ["Transition into section 2", "Transition into section 3"],
+  "follow_up_question": "A single, direct question to confirm your interpretation"
+}}
+"""
+)
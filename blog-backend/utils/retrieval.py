@@ -0,0 +1,106 @@
+import os
+import re
+import logging
+from time import perf_counter
+from typing import Any, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "120"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "how",
+    "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to", "was",
+    "were", "what", "when", "which", "who", "why", "will", "with", "you", "your", "can", "more",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def chunk_text(text: str, size: int = 120, overlap: int = 30) -> List[str]:
+    """Split text into passages of about `size` words, overlapping by `overlap` words."""
+    words = text.split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    step = max(1, size - overlap)
+    return [" ".join(words[i:i + size]) for i in range(0, max(1, len(words) - overlap), step)]
+
+
+class PassageIndex:
+    """
+    BM25 index over passages chunked from the session's articles.
+
+    The postings are built with numpy in one pass: every (passage, term) pair
+    is encoded as a single integer key and counted with np.unique, so term
+    frequencies, document frequencies and BM25 weights are whole-array
+    operations. Postings are sorted by term, so a query only touches the
+    postings of its own terms.
+    """
+
+    def __init__(self, articles: List[Dict[str, Any]], chunk_words: int = RETRIEVAL_CHUNK_WORDS,
+                 k1: float = 1.5, b: float = 0.75):
+        start = perf_counter()
+        self.passages: List[Dict[str, Any]] = []
+        for article in articles:
+            for passage in chunk_text(article.get("content") or "", size=chunk_words):
+                self.passages.append({"title": article.get("title", ""), "url": article.get("url", ""), "text": passage})
+
+        tokenized = [tokenize(passage["text"]) for passage in self.passages]
+        n = len(self.passages)
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=n)
+        vocabulary: Dict[str, int] = {}
+        term_ids = np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for tokens in tokenized for t in tokens),
+                               dtype=np.int64, count=int(lengths.sum()))
+        self.vocabulary = vocabulary
+        doc_ids = np.repeat(np.arange(n, dtype=np.int64), lengths)
+
+        keys, tf = np.unique(term_ids * max(1, n) + doc_ids, return_counts=True)
+        # keys are sorted by term first, so each term's postings are contiguous
+        self.posting_terms = keys // max(1, n)
+        self.posting_docs = keys % max(1, n)
+        df = np.bincount(self.posting_terms, minlength=max(1, len(vocabulary))).astype(np.float32)
+        self.term_offsets = np.concatenate(([0], np.cumsum(df).astype(np.int64)))
+
+        idf = np.log((n - df + 0.5) / (df + 0.5) + 1.0)
+        avgdl = float(lengths.mean()) if n else 0.0
+        doc_len = lengths[self.posting_docs].astype(np.float32)
+        norm = k1 * (1 - b + b * doc_len / (avgdl or 1.0))
+        self.posting_weights = (idf[self.posting_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        logger.info("[RETRIEVAL] Built index | articles=%d | passages=%d | terms=%d | postings=%d | build_ms=%d",
+                    len(articles), n, len(vocabulary), len(keys), int((perf_counter() - start) * 1000))
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Dict[str, Any]]:
+        """Top-k passages for the query, each with its source title/url and BM25 score."""
+        if not self.passages:
+            return []
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term_id in term_ids:
+            lo, hi = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            np.add.at(scores, self.posting_docs[lo:hi], self.posting_weights[lo:hi])
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.passages[i], "score": round(float(scores[i]), 4)} for i in top]
+
+
+def format_passages(passages: List[Dict[str, Any]]) -> List[str]:
+    return [f"Source: {p['title']}\nURL: {p['url']}\nPassage: {p['text']}" for p in passages]
@@ -0,0 +1,150 @@
+import os
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from utils.metrics import completion_tokens as completion_tokens_total, prompt_tokens as prompt_tokens_total
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to ~4 chars per token
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+TOKEN_BUDGET_DEFAULT = int(os.getenv("TOKEN_BUDGET_DEFAULT", "32000"))
+# Per-node prompt budgets; override with TOKEN_BUDGET_<NODE>, e.g. TOKEN_BUDGET_WRITE_SECTIONS=48000
+TOKEN_BUDGETS = {
+    "extract_writing_style": 16000,
+    "generate_outlines": 24000,
+    "write_sections": 48000,
+    "write_section": 16000,
+}
+_TRUNCATION_MARKER = " …[truncated]"
+_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """cl100k_base when tiktoken and its encoding file are available, else None (character estimate)."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = False
+                if tiktoken is not None:
+                    try:
+                        _encoding = tiktoken.get_encoding(os.getenv("TIKTOKEN_ENCODING", "cl100k_base"))
+                    except Exception as e:
+                        logger.warning("[TOKENS] tiktoken encoding unavailable, estimating by characters: %s", e)
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]) + _TRUNCATION_MARKER
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars] + _TRUNCATION_MARKER
+
+
+def node_budget(node: str) -> int:
+    return int(os.getenv(f"TOKEN_BUDGET_{node.upper()}", str(TOKEN_BUDGETS.get(node, TOKEN_BUDGET_DEFAULT))))
+
+
+def fit_prompt(
+    node: str,
+    template: str,
+    prompt_vars: Dict[str, Any],
+    flexible: Dict[str, List[str]],
+    separator: str = "\n\n",
+) -> Dict[str, Any]:
+    """
+    Fill the flexible prompt variables so the rendered prompt fits the node's budget.
+
+    prompt_vars holds every fixed variable; flexible maps the remaining ones
+    (source articles, reference content) to their parts. Whatever the
+    template and fixed variables leave of the budget is shared by the parts
+    in proportion to their size, so each source keeps its beginning instead
+    of later sources being dropped entirely. Per-variable token counts are logged.
+    """
+    budget = node_budget(node)
+    filled = dict(prompt_vars)
+    filled.update({name: "" for name in flexible})
+    fixed_tokens = count_tokens(template.format(**filled))
+    part_tokens = {name: [count_tokens(p) for p in parts] for name, parts in flexible.items()}
+    total = sum(sum(counts) for counts in part_tokens.values())
+    available = max(0, budget - fixed_tokens)
+    scale = min(1.0, available / total) if total else 1.0
+
+    for name, parts in flexible.items():
+        if scale < 1.0:
+            parts = [truncate_tokens(p, int(n * scale)) for p, n in zip(parts, part_tokens[name])]
+        filled[name] = separator.join(p for p in parts if p)
+
+    logger.info("[TOKENS] node=%s | budget=%d | fixed=%d | %s | scale=%.2f",
+                node, budget, fixed_tokens,
+                " | ".join(f"{name}={sum(counts)}" for name, counts in part_tokens.items()), scale)
+    if scale < 1.0:
+        logger.warning("[TOKENS] node=%s | prompt over budget, truncated sources to %.0f%% (%d -> %d tokens)",
+                       node, scale * 100, total, available)
+    return filled
+
+
+class TokenUsage:
+    """
+    Prompt / completion token totals per node, from the LLM responses' usage_metadata.
+    Responses served from the LLM response cache are counted as cached_calls only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, node: str, message: Any) -> None:
+        if (getattr(message, "response_metadata", None) or {}).get("cache_hit"):
+            with self._lock:
+                self._usage[node]["cached_calls"] += 1
+            return
+        usage = getattr(message, "usage_metadata", None) or {}
+        prompt_tokens = int(usage.get("input_tokens", 0))
+        completion_tokens = int(usage.get("output_tokens", 0))
+        with self._lock:
+            counts = self._usage[node]
+            counts["calls"] += 1
+            counts["prompt_tokens"] += prompt_tokens
+            counts["completion_tokens"] += completion_tokens
+        prompt_tokens_total.inc(prompt_tokens, node=node)
+        completion_tokens_total.inc(completion_tokens, node=node)
+        logger.info("[TOKENS] node=%s | prompt_tokens=%d | completion_tokens=%d",
+                    node, prompt_tokens, completion_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {node: dict(counts) for node, counts in self._usage.items()}
+
+
+token_usage = TokenUsage()
@@ -1,126 +1,357 @@
 import os
-from typing import List, Dict, Tuple
+import asyncio
+from time import perf_counter
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-from perplexity import Perplexity
+from perplexity import AsyncPerplexity
 import logging
-from langchain_community.document_loaders import WebBaseLoader
+from utils.clients import registry
+from utils.cache import TTLCache, make_key
+from utils.web_loader import FetchResult, afetch_urls
+from utils.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
 
 load_dotenv('.env')
 
+SEARCH_MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "4"))
+SEARCH_QUERY_TIMEOUT = float(os.getenv("PERPLEXITY_QUERY_TIMEOUT", "20"))
+SEARCH_MODE = os.getenv("PERPLEXITY_SEARCH_MODE", "batch").lower()
+SEARCH_BATCH_SIZE = int(os.getenv("PERPLEXITY_BATCH_SIZE", "5"))
 
-def _get_perplexity_client() -> Perplexity:
-    api_key = os.getenv("PERPLEXITY_API_KEY")
-    if not api_key:
-        raise ValueError("PERPLEXITY_API_KEY environment variable is required for web search")
-    return Perplexity(api_key=api_key)
+search_cache = TTLCache(
+    "search",
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "21600")),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512")),
+    path=os.getenv("SEARCH_CACHE_PATH") or None,
+    disk_max_bytes=int(os.getenv("SEARCH_CACHE_DISK_MAX_MB", "64")) * 1024 * 1024,
+)
 
 
-def perplexity_search(query: str, max_results: int = 1) -> List[Dict]:
+def _get_async_perplexity_client() -> AsyncPerplexity:
+    return registry.async_perplexity()
+
+
+def _field(result: Any, name: str, default: Any = None) -> Any:
+    if isinstance(result, dict):
+        return result.get(name, default)
+    return getattr(result, name, default)
+
+
+def _normalize_result(result: Any) -> Dict:
+    return {
+        "title": _field(result, 'title', '') or '',
+        "url": _field(result, 'url', '') or '',
+        "content": _field(result, 'content', '') or _field(result, 'snippet', '') or '',
+        "score": _field(result, 'score', None),
+        "published_date": _field(result, 'published_date', '') or _field(result, 'date', '') or '',
+    }
+
+
+def _search_cache_key(query: str, max_results: int) -> str:
+    return make_key(" ".join(query.lower().split()), max_results)
+
+
+def _search_kwargs(queries: List[str], max_results: int, timeout: Optional[float]) -> Dict[str, Any]:
+    kwargs = {"query": list(queries), "max_results": max_results}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    return kwargs
+
+
+def _single_results(search: Any, max_results: int) -> List[Dict]:
+    raw = list(search.results or [])
+    if raw and isinstance(raw[0], (list, tuple)):
+        raw = list(raw[0])
+    return [_normalize_result(result) for result in raw][:max_results]
+
+
+def _grouped_results(search: Any, queries: List[str], max_results: int) -> List[Optional[List[Dict]]]:
+    raw = list(search.results or [])
+    if raw and all(isinstance(group, (list, tuple)) for group in raw) and len(raw) == len(queries):
+        grouped = [[_normalize_result(r) for r in group][:max_results] for group in raw]
+    elif len(queries) == 1:
+        grouped = [[_normalize_result(r) for r in raw][:max_results]]
+    else:
+        logger.warning("[PERPLEXITY_BATCH] response has %d ungrouped results for %d queries, cannot map back",
+                       len(raw), len(queries))
+        return [None] * len(queries)
+    logger.info("[PERPLEXITY_BATCH] results_per_query=%s", [len(g) for g in grouped])
+    return grouped
+
+
+def _sample(results: List[Dict]) -> List[Dict]:
+    return [
+        {
+            "title": r.get("title", ""),
+            "url": r.get("url"),
+            "score": r.get("score"),
+        }
+        for r in results[:3]
+    ]
+
+
+async def _cached_search(query: str, max_results: int, use_cache: bool) -> Optional[List[Dict]]:
+    if not use_cache:
+        return None
+    cached = await search_cache.aget(_search_cache_key(query, max_results))
+    if cached is not None:
+        logger.info("[PERPLEXITY] cache hit | query='%s' | results=%d", query, len(cached))
+    return cached
+
+
+async def _store_search(query: str, max_results: int, results: Optional[List[Dict]]):
+    if results:
+        await search_cache.aset(_search_cache_key(query, max_results), results)
+
+
+async def aperplexity_search(
+    query: str,
+    max_results: int = 1,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> List[Dict]:
     """
-    Perform a Perplexity search for a single query.
-    Returns a normalized list with title, url, content.
+    Perform a Perplexity search for a single query with the pooled AsyncPerplexity client.
+    Returns a normalized list with title, url, content (at most max_results items).
+    Results are served from / written to the search cache; use_cache=False skips
+    the lookup but still refreshes the cached entry.
     """
+    cached = await _cached_search(query, max_results, use_cache)
+    if cached is not None:
+        return cached
     logger.info("[PERPLEXITY] query='%s' | max_results=%d", query, max_results)
-    client = _get_perplexity_client()
-    
+    client = _get_async_perplexity_client()
+
     try:
-        search = client.search.create(query=[query])
-        
-        results = []
-        for result in search.results:
-            norm = {
-                "title": getattr(result, 'title', ''),
-                "url": getattr(result, 'url', ''),
-                "content": getattr(result, 'content', '') or getattr(result, 'snippet', '') or '',
-                "score": getattr(result, 'score', None),
-                "published_date": getattr(result, 'published_date', '') or getattr(result, 'date', '') or '',
-            }
-            results.append(norm)
-        
-        logger.info(
-            "[PERPLEXITY] results=%d | sample=%s",
-            len(results),
-            [
-                {
-                    "title": r.get("title", ""),
-                    "url": r.get("url"),
-                    "score": r.get("score"),
-                }
-                for r in results[:3]
-            ],
-        )
+        with track_call("perplexity", "search"):
+            search = await client.search.create(**_search_kwargs([query], max_results, timeout))
+        results = _single_results(search, max_results)
+        logger.info("[PERPLEXITY] results=%d | sample=%s", len(results), _sample(results))
+        await _store_search(query, max_results, results)
         return results
     except Exception as e:
         logger.error(f"[PERPLEXITY] Search failed: {e}")
         return []
 
 
-def search_articles(query: str, max_results: int = 1) -> List[Dict]:
+async def aperplexity_search_batch(
+    queries: List[str],
+    max_results: int = 1,
+    timeout: Optional[float] = None,
+) -> List[Optional[List[Dict]]]:
     """
-    Perform a single Perplexity search for the provided query/keywords and
-    return up to max_results normalized items. No additional sorting is applied.
+    Perform one Perplexity search request for several queries.
+    Returns one normalized result list per query (in query order, at most
+    max_results items each). An entry is None when the response could not be
+    mapped back to its query, so the caller can fall back to a single search.
     """
-    return perplexity_search(query=query, max_results=max_results)
+    logger.info("[PERPLEXITY_BATCH] queries=%s | max_results=%d", queries, max_results)
+    client = _get_async_perplexity_client()
+
+    try:
+        with track_call("perplexity", "search_batch"):
+            search = await client.search.create(**_search_kwargs(queries, max_results, timeout))
+    except Exception as e:
+        logger.error(f"[PERPLEXITY_BATCH] Search failed: {e}")
+        return [None] * len(queries)
+    return _grouped_results(search, queries, max_results)
 
 
-def search_articles_parallel(queries: List[str], max_results: int = 1) -> List[Dict]:
+async def _arun_bounded(
+    fn: Callable[[Any], Awaitable[Any]],
+    items: List[Any],
+    max_workers: int,
+    timeout: float,
+    label: str,
+) -> List[Optional[Any]]:
     """
-    Performs Perplexity search for each query separately and limits results per query.
-    Returns max_results articles per query (total = len(queries) * max_results).
+    Run fn(item) for every item with at most max_workers coroutines in flight.
+    Each item gets its own deadline of `timeout` seconds once it holds a slot
+    (items waiting for a slot are not penalised). Results come back in input
+    order, with None for items that failed or timed out, so callers can keep
+    partial results.
     """
-    logger.info("[PERPLEXITY_MULTI] queries=%s | max_results_per_query=%d", queries, max_results)
-    
-    all_results = []
-    for query in queries:
-        query_results = perplexity_search(query=query, max_results=max_results)
-        all_results.extend(query_results[:max_results])
-    
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def _timed(item: Any):
+        async with semaphore:
+            start = perf_counter()
+            try:
+                value = await asyncio.wait_for(fn(item), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("[%s] item=%r | timed out after %.1fs, dropping result", label, item, timeout)
+                return None
+            except Exception as e:
+                logger.error("[%s] item=%r | failed: %s", label, item, e)
+                return None
+            logger.info("[%s] item=%r | latency_ms=%d", label, item, int((perf_counter() - start) * 1000))
+            return value
+
+    return list(await asyncio.gather(*(_timed(item) for item in items)))
+
+
+def _log_multi(label: str, all_results: List[Dict], queries: List[str], per_query: List[Optional[List[Dict]]], start: float):
     logger.info(
-        "[PERPLEXITY_MULTI] total_results=%d (from %d queries) | sample=%s",
+        "[%s] total_results=%d (from %d queries, %d completed) | duration_ms=%d | sample=%s",
+        label,
         len(all_results),
         len(queries),
-        [
-            {
-                "title": r.get("title", ""),
-                "url": r.get("url"),
-                "score": r.get("score"),
-            }
-            for r in all_results[:3]
-        ],
+        sum(1 for r in per_query if r is not None),
+        int((perf_counter() - start) * 1000),
+        _sample(all_results),
+    )
+
+
+def _flatten(per_query: List[Optional[List[Dict]]], max_results: int) -> List[Dict]:
+    all_results = []
+    for query_results in per_query:
+        all_results.extend((query_results or [])[:max_results])
+    return all_results
+
+
+async def asearch_articles_parallel(
+    queries: List[str],
+    max_results: int = 1,
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> List[Dict]:
+    """
+    Performs Perplexity search for all queries concurrently and limits results per query.
+    Returns max_results articles per query (total <= len(queries) * max_results), in query order.
+    Queries that fail or exceed the per-query timeout are skipped (partial results).
+    """
+    max_workers = max_workers or SEARCH_MAX_CONCURRENCY
+    timeout = timeout or SEARCH_QUERY_TIMEOUT
+    logger.info("[PERPLEXITY_MULTI] queries=%s | max_results_per_query=%d | max_workers=%d | timeout_s=%.1f",
+                queries, max_results, max_workers, timeout)
+    start = perf_counter()
+
+    per_query = await _arun_bounded(
+        lambda q: aperplexity_search(query=q, max_results=max_results, timeout=timeout, use_cache=use_cache),
+        queries,
+        max_workers=max_workers,
+        timeout=timeout,
+        label="PERPLEXITY_MULTI",
+    )
+
+    all_results = _flatten(per_query, max_results)
+    _log_multi("PERPLEXITY_MULTI", all_results, queries, per_query, start)
+    return all_results
+
+
+async def _plan_batches(
+    queries: List[str],
+    max_results: int,
+    batch_size: int,
+    use_cache: bool,
+) -> Tuple[List[Optional[List[Dict]]], List[int], List[List[str]]]:
+    """Split queries into cache hits and batches of misses. Returns (per_query, missing indices, batches)."""
+    per_query: List[Optional[List[Dict]]] = [None] * len(queries)
+    if use_cache:
+        for i, query in enumerate(queries):
+            per_query[i] = await search_cache.aget(_search_cache_key(query, max_results))
+    missing = [i for i, r in enumerate(per_query) if r is None]
+    missing_queries = [queries[i] for i in missing]
+    batches = [missing_queries[i:i + batch_size] for i in range(0, len(missing_queries), batch_size)]
+    logger.info("[PERPLEXITY_BATCH] queries=%d | cache_hits=%d | batches=%d | batch_size=%d | max_results_per_query=%d",
+                len(queries), len(queries) - len(missing), len(batches), batch_size, max_results)
+    return per_query, missing, batches
+
+
+async def _merge_batches(
+    queries: List[str],
+    max_results: int,
+    per_query: List[Optional[List[Dict]]],
+    missing: List[int],
+    batches: List[List[str]],
+    batch_results: List[Optional[List[Optional[List[Dict]]]]],
+) -> List[int]:
+    """Write batch results into per_query (and the cache). Returns indices that still need a single search."""
+    fetched: List[Optional[List[Dict]]] = []
+    for batch, results in zip(batches, batch_results):
+        fetched.extend(results if results is not None else [None] * len(batch))
+    for i, results in zip(missing, fetched):
+        per_query[i] = results
+        await _store_search(queries[i], max_results, results)
+    unmapped = [i for i, r in enumerate(per_query) if r is None]
+    if unmapped:
+        logger.info("[PERPLEXITY_BATCH] falling back to single searches for %d queries", len(unmapped))
+    return unmapped
+
+
+async def asearch_articles_batched(
+    queries: List[str],
+    max_results: int = 1,
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> List[Dict]:
+    """
+    Performs Perplexity search by packing queries into as few multi-query
+    requests as possible (batch_size queries per request). Results are mapped
+    back to their query and capped at max_results per query, in query order.
+    Cached queries are answered without a request; queries whose batch could
+    not be mapped fall back to concurrent single searches. Batches and
+    fallback share one deadline of `timeout` seconds: the fallback only gets
+    the time the batches left over.
+    """
+    batch_size = max(1, batch_size or SEARCH_BATCH_SIZE)
+    timeout = timeout or SEARCH_QUERY_TIMEOUT
+    start = perf_counter()
+
+    per_query, missing, batches = await _plan_batches(queries, max_results, batch_size, use_cache)
+    deadline = perf_counter() + timeout
+    batch_results = await _arun_bounded(
+        lambda batch: aperplexity_search_batch(batch, max_results=max_results, timeout=timeout),
+        batches,
+        max_workers=SEARCH_MAX_CONCURRENCY,
+        timeout=timeout,
+        label="PERPLEXITY_BATCH",
     )
+    unmapped = await _merge_batches(queries, max_results, per_query, missing, batches, batch_results)
+    remaining = deadline - perf_counter()
+    if unmapped and remaining <= 0:
+        logger.warning("[PERPLEXITY_BATCH] deadline of %.1fs reached, skipping the fallback for %d queries",
+                       timeout, len(unmapped))
+    elif unmapped:
+        fallback = await _arun_bounded(
+            lambda q: aperplexity_search(query=q, max_results=max_results, timeout=remaining, use_cache=False),
+            [queries[i] for i in unmapped],
+            max_workers=SEARCH_MAX_CONCURRENCY,
+            timeout=remaining,
+            label="PERPLEXITY_MULTI",
+        )
+        for i, results in zip(unmapped, fallback):
+            per_query[i] = results
+
+    all_results = _flatten(per_query, max_results)
+    _log_multi("PERPLEXITY_BATCH", all_results, queries, per_query, start)
     return all_results
 
 
-def search_articles_and_citations(keywords: str) -> Tuple[List[Dict], List[Dict]]:
-    logger.warning("search_articles_and_citations is deprecated; use search_articles instead.")
-    articles = search_articles(keywords, max_results=1)
-    return articles, []
+def _combine_pages(results: List[FetchResult]) -> str:
+    content_parts = []
+    for result in results:
+        if result.ok:
+            content_parts.append(f"URL: {result.url}\nContent: {result.content}")
+        else:
+            logger.warning("[URL_LOADER] Skipping %s: %s", result.url, result.error)
+    combined_content = "\n\n".join(content_parts)
+    
+    logger.info("[URL_LOADER] Loaded %d/%d documents, total length: %d chars",
+               len(content_parts), len(results), len(combined_content))
+    return combined_content
 
 
-def load_content_from_urls(urls: List[str]) -> str:
+async def aload_content_from_urls(urls: List[str], session_id: Optional[str] = None) -> str:
     """
-    Load content from a list of URLs using WebBaseLoader.
-    Returns concatenated content from all URLs with cleaned whitespace.
+    Load content from a list of URLs with the async fetcher in utils.web_loader.
+    Returns concatenated content from the URLs that loaded, with cleaned whitespace.
+    URLs that fail are logged and skipped. With a session_id, URLs already
+    fetched for the same session are not downloaded again.
     """
     logger.info("[URL_LOADER] Loading content from %d URLs: %s", len(urls), urls)
-    
-    try:
-        loader = WebBaseLoader(urls)
-        documents = loader.load()
-        
-        content_parts = []
-        for doc in documents:
-            raw_content = doc.page_content
-            cleaned_content = ' '.join(raw_content.split())
-            content_parts.append(f"URL: {doc.metadata.get('source', 'Unknown')}\nContent: {cleaned_content}")
-        combined_content = "\n\n".join(content_parts)
-        
-        logger.info("[URL_LOADER] Successfully loaded %d documents, total length: %d chars", 
-                   len(documents), len(combined_content))
-        return combined_content
-    except Exception as e:
-        logger.error(f"[URL_LOADER] Failed to load URLs: {e}")
-        return ""
\ No newline at end of file
+    return _combine_pages(await afetch_urls(urls, session_id=session_id))
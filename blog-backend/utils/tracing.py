@@ -0,0 +1,250 @@
+import os
+import json
+import random
+import logging
+import itertools
+import threading
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, time
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+# Share of requests traced (0 disables tracing; 1 traces every request).
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Finished traces kept in memory for /debug/trace.
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+# Also append every finished trace as one JSON line to this file.
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "")
+
+# Span kinds counted as waiting on an external service rather than local work.
+WAITING_KINDS = {"call"}
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "kind", "start", "end", "error")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, kind: str, start: float):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end: Optional[float] = None
+        self.error = False
+
+
+class Trace:
+    """Spans of one traced request; span times are perf_counter() values."""
+
+    def __init__(self, name: str, session_id: Optional[str]):
+        self.trace_id = uuid4().hex
+        self.name = name
+        self.session_id = session_id
+        self.started_at = time()
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+
+    def open(self, name: str, kind: str, parent: Optional[Span], start: Optional[float] = None) -> Span:
+        span = Span(next(self._ids), parent.span_id if parent else None, name, kind,
+                    perf_counter() if start is None else start)
+        self.spans.append(span)
+        return span
+
+
+_current: ContextVar[Optional[tuple]] = ContextVar("trace_span", default=None)
+_NOOP = nullcontext()
+
+
+class _SpanContext:
+    __slots__ = ("_trace", "_parent", "_name", "_kind", "_span", "_token")
+
+    def __init__(self, trace: Trace, parent: Span, name: str, kind: str):
+        self._trace, self._parent, self._name, self._kind = trace, parent, name, kind
+
+    def __enter__(self):
+        self._span = self._trace.open(self._name, self._kind, self._parent)
+        self._token = _current.set((self._trace, self._span))
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        self._span.end = perf_counter()
+        self._span.error = exc_type is not None
+        _current.reset(self._token)
+        return False
+
+
+def span(name: str, kind: str = "internal"):
+    """Child span of the current one; a shared no-op when the request is not traced."""
+    current = _current.get()
+    if current is None:
+        return _NOOP
+    return _SpanContext(current[0], current[1], name, kind)
+
+
+def record_span(name: str, kind: str, seconds: float, ok: bool = True) -> None:
+    """Add a finished child span that ended now and lasted `seconds` (for calls timed elsewhere)."""
+    current = _current.get()
+    if current is None:
+        return
+    trace, parent = current
+    end = perf_counter()
+    child = trace.open(name, kind, parent, start=end - seconds)
+    child.end = end
+    child.error = not ok
+
+
+class TraceStore:
+    """Ring buffer of finished trace reports, indexed by session, with an optional JSONL exporter."""
+
+    def __init__(self, size: int, jsonl_path: str = ""):
+        self._lock = threading.Lock()
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._jsonl_path = jsonl_path
+        if jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+
+    def add(self, report: Dict[str, Any]) -> None:
+        with self._lock:
+            self._traces.append(report)
+            if self._jsonl_path:
+                try:
+                    with open(self._jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(report, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.warning("[TRACE] JSONL export failed: %s", e)
+
+    def for_session(self, session_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+        with self._lock:
+            matches = [t for t in self._traces if t["session_id"] == session_id]
+        return matches[-limit:][::-1] if limit > 0 else []
+
+
+trace_store = TraceStore(TRACE_BUFFER_SIZE, TRACE_JSONL_PATH)
+
+
+def _critical_segments(span: Span, children: Dict[int, List[Span]]) -> List[tuple]:
+    """
+    Walk back from the span's end: the child that finished last is on the
+    critical path, then the child that finished before that one started, and
+    so on; gaps between them are the span's own time. Children overlapping a
+    chosen child ran in parallel and are skipped. A child reaching outside
+    its parent (a background call still running when the parent ended) only
+    counts for the part inside the parent.
+    """
+    segments = []
+    cursor = span.end
+    for child in sorted(children.get(span.span_id, []), key=lambda c: c.end, reverse=True):
+        child_end = min(child.end, span.end)
+        if child_end > cursor or child_end <= span.start:
+            continue
+        if cursor > child_end:
+            segments.append((span, child_end, cursor))
+        child_start = max(child.start, span.start)
+        for s, start, end in _critical_segments(child, children):
+            start, end = max(start, child_start), min(end, child_end)
+            if end > start:
+                segments.append((s, start, end))
+        cursor = child_start
+    if cursor > span.start:
+        segments.append((span, span.start, cursor))
+    return segments
+
+
+def build_report(trace: Trace) -> Dict[str, Any]:
+    """Span tree, critical path and the waiting / computing split of the critical path."""
+    root = trace.spans[0]
+    now = perf_counter()
+    for s in trace.spans:
+        if s.end is None:
+            s.end = now
+    children: Dict[int, List[Span]] = defaultdict(list)
+    for s in trace.spans[1:]:
+        children[s.parent_id].append(s)
+
+    def ms(value: float) -> float:
+        return round(value * 1000, 2)
+
+    path: List[Dict[str, Any]] = []
+    for s, start, end in sorted(_critical_segments(root, children), key=lambda seg: seg[1]):
+        if path and path[-1]["span_id"] == s.span_id and abs(path[-1]["_end"] - start) < 1e-9:
+            path[-1]["_end"] = end
+            path[-1]["duration_ms"] = ms(end - path[-1]["_start"])
+            continue
+        path.append({"span_id": s.span_id, "name": s.name, "kind": s.kind,
+                     "start_ms": ms(start - root.start), "duration_ms": ms(end - start), "_start": start, "_end": end})
+    waiting = sum(p["_end"] - p["_start"] for p in path if p["kind"] in WAITING_KINDS)
+    total = root.end - root.start
+    for p in path:
+        del p["_start"], p["_end"]
+
+    by_name: Dict[str, Dict[str, float]] = OrderedDict()
+    for s in trace.spans:
+        entry = by_name.setdefault(s.name, {"kind": s.kind, "count": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + ms(s.end - s.start), 2)
+
+    return {
+        "trace_id": trace.trace_id,
+        "session_id": trace.session_id,
+        "endpoint": trace.name,
+        "started_at": trace.started_at,
+        "duration_ms": ms(total),
+        "critical_path": path,
+        "critical_path_split_ms": {"waiting": ms(waiting), "computing": ms(total - waiting)},
+        "by_span": by_name,
+        "spans": [{"span_id": s.span_id, "parent_id": s.parent_id, "name": s.name, "kind": s.kind,
+                   "start_ms": ms(s.start - root.start), "duration_ms": ms(s.end - s.start), "error": s.error}
+                  for s in trace.spans],
+    }
+
+
+@contextmanager
+def trace_request(name: str, session_id: Optional[str]) -> Iterator[None]:
+    """Root span for one request, sampled at TRACE_SAMPLE_RATE; nested calls inside a trace are plain spans."""
+    if _current.get() is not None:
+        with span(name, "endpoint"):
+            yield
+        return
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        yield
+        return
+    trace = Trace(name, session_id)
+    root = trace.open(name, "endpoint", None)
+    token = _current.set((trace, root))
+    try:
+        yield
+    except BaseException:
+        root.error = True
+        raise
+    finally:
+        root.end = perf_counter()
+        try:
+            _current.reset(token)
+        except ValueError:
+            # a streaming response closed from another context; the token is gone with it
+            pass
+        try:
+            trace_store.add(build_report(trace))
+        except Exception as e:
+            logger.warning("[TRACE] Failed to record trace %s: %s", trace.trace_id, e)
+
+
+def traced_endpoint(name: str):
+    """Decorator for async endpoints taking a `req` with a session_id."""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with trace_request(name, getattr(kwargs.get("req"), "session_id", None)):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,291 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from utils.cache import TTLCache, make_key
+from utils.metrics import record_call
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv('.env')
+
+URL_FETCH_CONCURRENCY = int(os.getenv("URL_FETCH_CONCURRENCY", "8"))
+URL_CONNECT_TIMEOUT = float(os.getenv("URL_CONNECT_TIMEOUT", "5"))
+URL_READ_TIMEOUT = float(os.getenv("URL_READ_TIMEOUT", "15"))
+URL_TOTAL_TIMEOUT = float(os.getenv("URL_TOTAL_TIMEOUT", "30"))
+URL_MAX_BYTES = int(os.getenv("URL_MAX_BYTES", str(2 * 1024 * 1024)))
+URL_USER_AGENT = os.getenv("USER_AGENT", "Mozilla/5.0 (compatible; BlogGenerator/1.0)")
+
+_TEXT_CONTENT_TYPES = ("text/", "application/xhtml", "application/xml", "application/json")
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Cleaned page text keyed by URL, with the validators needed for conditional GETs.
+page_cache = TTLCache(
+    "pages",
+    ttl=float(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("PAGE_CACHE_MEMORY_MB", "32")) * 1024 * 1024,
+    path=os.getenv("PAGE_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "pages.sqlite")) or None,
+    disk_max_bytes=int(os.getenv("PAGE_CACHE_DISK_MAX_MB", "256")) * 1024 * 1024,
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    content: str = ""
+    status: Optional[int] = None
+    error: Optional[str] = None
+    bytes_read: int = 0
+    truncated: bool = False
+    elapsed_ms: int = 0
+    body_hash: str = ""
+    cache_status: str = "miss"
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.content)
+
+
+def html_to_text(raw: str, content_type: str = "text/html") -> str:
+    """Strip markup and collapse whitespace, like WebBaseLoader's page_content cleanup."""
+    if "html" in content_type or "xml" in content_type:
+        soup = BeautifulSoup(raw, "html.parser")
+        for tag in soup(["script", "style", "noscript", "template"]):
+            tag.decompose()
+        raw = soup.get_text(" ")
+    return " ".join(raw.split())
+
+
+async def _read_capped(response: httpx.Response, max_bytes: int) -> Tuple[bytes, bool]:
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        remaining = max_bytes - size
+        if len(chunk) >= remaining:
+            chunks.append(chunk[:remaining])
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks), False
+
+
+def _fresh_until(headers: httpx.Headers) -> float:
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    return time.time() + int(match.group(1)) if match else 0.0
+
+
+def _validator_headers(cached: Optional[dict]) -> Dict[str, str]:
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+async def _fetch_one(
+    client: httpx.AsyncClient,
+    url: str,
+    max_bytes: int,
+    use_cache: bool = True,
+    revalidate: bool = True,
+) -> FetchResult:
+    """
+    Fetch one URL through the page cache:
+    - cached and still fresh (Cache-Control max-age), or revalidate=False: no request at all
+    - otherwise a conditional GET; 304 reuses the cached text
+    - 200 with the same body hash as the cached copy skips re-parsing
+    """
+    result = FetchResult(url=url)
+    start = perf_counter()
+    cache_key = make_key(url)
+    cached = await page_cache.aget(cache_key) if use_cache else None
+    try:
+        if cached and not revalidate:
+            result.content, result.body_hash, result.cache_status = cached["content"], cached["body_hash"], "session"
+            return result
+        if cached and cached.get("fresh_until", 0) > time.time():
+            result.content, result.body_hash, result.cache_status = cached["content"], cached["body_hash"], "fresh"
+            return result
+        async with client.stream("GET", url, headers=_validator_headers(cached)) as response:
+            result.status = response.status_code
+            if response.status_code == 304 and cached:
+                result.content, result.body_hash, result.cache_status = cached["content"], cached["body_hash"], "revalidated"
+                await page_cache.aset(cache_key, {**cached, "fresh_until": _fresh_until(response.headers)})
+                return result
+            if response.status_code >= 400:
+                result.error = f"HTTP {response.status_code}"
+                return result
+            content_type = response.headers.get("content-type", "text/html").lower()
+            if not content_type.startswith(_TEXT_CONTENT_TYPES):
+                result.error = f"unsupported content type '{content_type}'"
+                return result
+            body, result.truncated = await _read_capped(response, max_bytes)
+            result.bytes_read = len(body)
+            result.body_hash = hashlib.sha256(body).hexdigest()
+            if cached and cached.get("body_hash") == result.body_hash:
+                result.content, result.cache_status = cached["content"], "unchanged"
+            else:
+                raw = body.decode(response.charset_encoding or "utf-8", errors="replace")
+                result.content = await asyncio.to_thread(html_to_text, raw, content_type)
+            if result.content:
+                await page_cache.aset(cache_key, {
+                    "content": result.content,
+                    "body_hash": result.body_hash,
+                    "etag": response.headers.get("etag", ""),
+                    "last_modified": response.headers.get("last-modified", ""),
+                    "fresh_until": _fresh_until(response.headers),
+                })
+        if not result.content:
+            result.error = "empty content"
+    except httpx.TimeoutException as e:
+        result.error = f"timeout ({type(e).__name__})"
+    except httpx.HTTPError as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.elapsed_ms = int((perf_counter() - start) * 1000)
+        if result.cache_status not in ("fresh", "session"):
+            record_call("web", "fetch", perf_counter() - start, result.error is None)
+    return result
+
+
+class _SessionFetchMemo:
+    """
+    Per-session record of URLs already fetched (or being fetched), so a URL
+    requested by several nodes of the same session is downloaded once.
+    Only fetches in flight hold a future; once one succeeds the memo keeps
+    just the URL and the page text lives in page_cache alone, which later
+    requests of the session read without revalidating. Bounded LRU over
+    sessions; failed fetches are forgotten so they can be retried.
+    """
+
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        # url -> future while the fetch is in flight, None once it succeeded
+        self._sessions: "OrderedDict[str, Dict[str, Optional[Future]]]" = OrderedDict()
+
+    def claim(self, session_id: str, urls: List[str]) -> Tuple[Dict[str, Future], Dict[str, Future], List[str]]:
+        """
+        Returns (owned, pending, fetched): futures for the urls the caller is
+        responsible for fetching, futures for urls another caller is fetching,
+        and the urls this session already fetched.
+        """
+        with self._lock:
+            pages = self._sessions.get(session_id)
+            if pages is None:
+                pages = self._sessions[session_id] = {}
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            owned, pending, fetched = {}, {}, []
+            for url in urls:
+                if url not in pages:
+                    pages[url] = owned[url] = Future()
+                elif pages[url] is None:
+                    fetched.append(url)
+                else:
+                    pending[url] = pages[url]
+            return owned, pending, fetched
+
+    def resolve(self, session_id: str, result: FetchResult, future: Future):
+        with self._lock:
+            pages = self._sessions.get(session_id)
+            if pages is not None and pages.get(result.url) is future:
+                if result.ok:
+                    pages[result.url] = None
+                else:
+                    del pages[result.url]
+        future.set_result(result)
+
+
+_session_memo = _SessionFetchMemo()
+
+
+def _dedupe(urls: List[str]) -> List[str]:
+    return list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+
+
+async def afetch_urls(
+    urls: List[str],
+    session_id: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[FetchResult]:
+    """
+    Fetch and clean several URLs concurrently.
+
+    - bounded concurrency (URL_FETCH_CONCURRENCY)
+    - connect/read timeouts plus a total deadline per URL
+    - streaming reads that stop at max_bytes (URL_MAX_BYTES)
+    - partial success: every URL gets a FetchResult with its own error, if any
+
+    With a session_id, a URL already fetched (or being fetched) for that
+    session is not downloaded again: its cached copy is reused as is.
+    Across sessions, pages go through the persistent page cache (conditional GET).
+    """
+    urls = _dedupe(urls)
+    if not urls:
+        return []
+    max_bytes = max_bytes or URL_MAX_BYTES
+    semaphore = asyncio.Semaphore(max_concurrency or URL_FETCH_CONCURRENCY)
+    timeout = httpx.Timeout(URL_READ_TIMEOUT, connect=URL_CONNECT_TIMEOUT)
+
+    if session_id:
+        owned, pending, fetched = _session_memo.claim(session_id, urls)
+    else:
+        owned, pending, fetched = dict.fromkeys(urls), {}, []
+    if len(owned) < len(urls):
+        logger.info("[URL_LOADER] session=%s reusing %d already-fetched URLs", session_id, len(urls) - len(owned))
+    results: Dict[str, FetchResult] = {}
+
+    async with httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": URL_USER_AGENT},
+    ) as client:
+
+        async def _bounded(url: str, revalidate: bool = True):
+            result = FetchResult(url=url, error="cancelled")
+            try:
+                async with semaphore:
+                    result = await asyncio.wait_for(_fetch_one(client, url, max_bytes, use_cache, revalidate),
+                                                    timeout=URL_TOTAL_TIMEOUT)
+            except asyncio.TimeoutError:
+                result = FetchResult(url=url, error=f"timeout (>{URL_TOTAL_TIMEOUT:.0f}s total)",
+                                     elapsed_ms=int(URL_TOTAL_TIMEOUT * 1000))
+            except Exception as e:
+                result = FetchResult(url=url, error=f"{type(e).__name__}: {e}")
+            finally:
+                logger.info("[URL_LOADER] url=%s | status=%s | cache=%s | bytes=%d | truncated=%s | latency_ms=%d | error=%s",
+                            url, result.status, result.cache_status, result.bytes_read, result.truncated,
+                            result.elapsed_ms, result.error)
+                results[url] = result
+                if owned.get(url) is not None:
+                    _session_memo.resolve(session_id, result, owned[url])
+
+        await asyncio.gather(*(_bounded(url) for url in owned), *(_bounded(url, revalidate=False) for url in fetched))
+
+    for url, future in pending.items():
+        results[url] = await asyncio.wrap_future(future)
+    return [results[url] for url in urls]